@@ -9,7 +9,8 @@ class QLearningAgent:
         self.exploration_rate = exploration_rate
         
         # Initialize Q-table
-        self.q_table = np.zeros((env.board_size + 1, 6))  # 6 possible actions (dice rolls 1-6)
+        self.q_table = np.zeros((env.board_size + 1, 6),  # 6 possible actions (dice rolls 1-6)
+                                dtype=np.float32 if env.sparse else float)
     
     def choose_action(self, state):
         """Choose an action using epsilon-greedy policy"""
@@ -55,6 +56,79 @@ class QLearningAgent:
         
         return steps_per_episode
     
+    def apply_batch_updates(self, states, actions, targets):
+        """Apply a batch of Q-learning updates towards precomputed targets
+        
+        Repeated (state, action) pairs are composed exactly as if their updates
+        had been applied one after another in batch order, rather than letting
+        the last write win.
+        """
+        keys = states * 6 + (actions - 1)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        targets = targets[order]
+        
+        pairs, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        group = np.repeat(np.arange(len(pairs)), counts)
+        updates_after = counts[group] - 1 - (np.arange(len(keys)) - first[group])
+        
+        # q <- (1 - lr)^n q + sum_i lr (1 - lr)^(n - 1 - i) target_i
+        keep = 1.0 - self.learning_rate
+        weights = self.learning_rate * keep ** updates_after
+        q_values = self.q_table.reshape(-1)
+        q_values[pairs] = keep ** counts * q_values[pairs] + np.bincount(
+            group, weights=weights * targets, minlength=len(pairs))
+    
+    def train_vectorized(self, num_episodes=1000, num_envs=1024, seed=None):
+        """Train on many environments at once, stepping them all per iteration
+        
+        Actions are chosen epsilon-greedily in bulk from a seeded NumPy
+        generator, and exploration decays once per finished episode as in
+        train. Returns the step count of each episode in order of completion.
+        """
+        rng = np.random.default_rng(seed)
+        num_envs = min(num_envs, num_episodes)
+        board_size = self.env.board_size
+        
+        states = np.full(num_envs, self.env.reset(), dtype=np.int32)
+        steps = np.zeros(num_envs, dtype=np.int64)
+        steps_per_episode = np.zeros(num_episodes, dtype=np.int64)
+        started = num_envs
+        finished = 0
+        
+        while finished < num_episodes:
+            # Epsilon-greedy actions for every environment at once
+            explore = rng.random(len(states)) < self.exploration_rate
+            actions = np.where(explore, rng.integers(1, 7, size=len(states)),
+                               np.argmax(self.q_table[states], axis=1) + 1)
+            next_states, rewards = self.env.transition(states, actions)
+            
+            targets = rewards + self.discount_factor * np.max(self.q_table[next_states], axis=1)
+            self.apply_batch_updates(states, actions, targets)
+            states = next_states
+            steps += 1
+            
+            done = states == board_size
+            num_done = int(np.count_nonzero(done))
+            if num_done:
+                steps_per_episode[finished:finished + num_done] = steps[done]
+                finished += num_done
+                
+                # Decay exploration rate once per finished episode
+                self.exploration_rate = max(0.01, self.exploration_rate * 0.995 ** num_done)
+                
+                # Restart finished environments until every episode has started
+                restart = np.flatnonzero(done)[:num_episodes - started]
+                started += len(restart)
+                states[restart] = self.env.reset()
+                steps[restart] = 0
+                keep = ~done
+                keep[restart] = True
+                states = states[keep]
+                steps = steps[keep]
+        
+        return steps_per_episode
+    
     def get_policy(self):
         """Get the learned policy"""
         return np.argmax(self.q_table, axis=1) + 1 
\ No newline at end of file
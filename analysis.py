@@ -0,0 +1,152 @@
+import numpy as np
+
+# Largest board whose expected turns are solved with a dense matrix
+DENSE_SOLVE_LIMIT = 2000
+
+def roll_probabilities(env, policy=None, exploration_rate=0.0):
+    """Probability of each roll (1-6) from every state
+
+    With no policy every roll is equally likely (a fair die). With a policy
+    the chosen roll is taken, except that with probability
+    ``exploration_rate`` a uniformly random roll is taken instead, as in
+    ``simulate_games``. States without a policy action use a fair die.
+    """
+    num_states = env.board_size + 1
+    probs = np.full((num_states, 6), 1.0 / 6.0)
+    if policy is None:
+        return probs
+
+    policy = np.asarray(policy)
+    chosen = np.flatnonzero(policy >= 1)
+    probs[chosen] = exploration_rate / 6.0
+    probs[chosen, policy[chosen] - 1] += 1.0 - exploration_rate
+    return probs
+
+def transition_matrix(env, policy=None, exploration_rate=0.0):
+    """Build the Markov chain transition matrix over board cells
+
+    The matrix is dense, so sparse boards are refused rather than running
+    out of memory.
+    """
+    if env.sparse:
+        raise ValueError("transition_matrix is dense; use expected_turns or "
+                         "win_time_distribution for sparse boards")
+    num_states = env.board_size + 1
+    probs = roll_probabilities(env, policy, exploration_rate)
+
+    next_states = env.transition_rows(np.arange(num_states))[0]
+
+    matrix = np.zeros((num_states, num_states))
+    rows = np.repeat(np.arange(num_states), 6)
+    np.add.at(matrix, (rows, next_states.ravel()), probs.ravel())
+    return matrix
+
+def expected_turns(env, policy=None, exploration_rate=0.0):
+    """Exact expected number of turns to reach the final cell from every cell
+
+    Solves (I - Q) t = 1, where Q is the chain restricted to the transient
+    cells. The final cell has an expected value of 0. Boards of up to
+    ``DENSE_SOLVE_LIMIT`` cells are solved directly; sparse and larger ones
+    iteratively from their transition rows (see ``_solve_turns``), in
+    memory proportional to the board.
+    """
+    if env.sparse or env.board_size > DENSE_SOLVE_LIMIT:
+        return _solve_turns(env, roll_probabilities(env, policy, exploration_rate))
+
+    matrix = transition_matrix(env, policy, exploration_rate)
+    transient = np.arange(env.board_size + 1) != env.board_size
+    q = matrix[np.ix_(transient, transient)]
+
+    try:
+        turns = np.linalg.solve(np.eye(len(q)) - q, np.ones(len(q)))
+    except np.linalg.LinAlgError:
+        raise ValueError("The final cell cannot be reached from every cell with this policy")
+
+    result = np.zeros(env.board_size + 1)
+    result[transient] = turns
+    return result
+
+def _solve_turns(env, probs, tolerance=1e-10, max_iterations=10_000):
+    """Expected turns to win by BiCGSTAB on (I - Q) t = 1
+
+    Only needs products with Q, one gather over the transition rows each,
+    so it works on boards far too large for a dense matrix. Simple sweeps
+    (t = 1 + Q t) would also converge, but need about as many sweeps as
+    the game has turns; BiCGSTAB needs a few hundred products even on
+    boards of 10^6 cells. Stops when the residual is below ``tolerance``
+    relative to that of t = 0.
+    """
+    n = env.board_size
+    next_states = env.transition_rows(np.arange(n, dtype=np.int32))[0]
+    probs = probs[:n]
+    padded = np.zeros(n + 1)  # The final cell's expected turns stay 0
+
+    def apply(x):
+        padded[:n] = x
+        return x - (padded[next_states] * probs).sum(axis=1)
+
+    # Textbook BiCGSTAB (van der Vorst)
+    b = np.ones(n)
+    x = np.zeros(n)
+    r = b.copy()
+    r_hat = r.copy()
+    p = np.zeros(n)
+    v = np.zeros(n)
+    rho = alpha = omega = 1.0
+    threshold = tolerance * np.linalg.norm(b)
+    for _ in range(max_iterations):
+        rho_next = r_hat @ r
+        if rho_next == 0 or omega == 0:
+            break
+        p = r + (rho_next / rho) * (alpha / omega) * (p - omega * v)
+        rho = rho_next
+        v = apply(p)
+        denominator = r_hat @ v
+        if denominator == 0:
+            break
+        alpha = rho / denominator
+        s = r - alpha * v
+        if np.linalg.norm(s) < threshold:
+            x += alpha * p
+            r = s
+            break
+        t = apply(s)
+        omega = (t @ s) / (t @ t)
+        x += alpha * p + omega * s
+        r = s - omega * t
+        if np.linalg.norm(r) < threshold:
+            break
+
+    if not np.linalg.norm(r) < threshold or not np.isfinite(x).all():
+        raise ValueError("The final cell cannot be reached from every cell with this policy, "
+                         "or the expected turns did not converge")
+    return np.append(x, 0.0)
+
+def win_time_distribution(env, policy=None, exploration_rate=0.0, start=1,
+                          tail_mass=1e-12, max_turns=100_000):
+    """Exact distribution of the number of turns needed to win
+
+    Propagates the probability of being on each cell forward one turn at a
+    time until less than ``tail_mass`` of it is still on the board (or
+    ``max_turns`` is reached). Returns ``(pmf, cdf)`` where ``pmf[k]`` is the
+    probability of winning on exactly turn ``k``.
+    """
+    num_states = env.board_size + 1
+    probs = roll_probabilities(env, policy, exploration_rate)
+    targets = env.transition_rows(np.arange(num_states))[0].ravel()
+
+    distribution = np.zeros(num_states)
+    distribution[start] = 1.0
+    pmf = [0.0]
+    remaining = 1.0
+    while remaining >= tail_mass and len(pmf) <= max_turns:
+        flow = (distribution[:, None] * probs).ravel()
+        distribution = np.bincount(targets, weights=flow, minlength=num_states)
+
+        # Remove the mass that just reached the final cell
+        pmf.append(distribution[env.board_size])
+        distribution[env.board_size] = 0.0
+        remaining = distribution.sum()
+
+    pmf = np.array(pmf)
+    return pmf, np.cumsum(pmf)
@@ -0,0 +1,165 @@
+import multiprocessing
+import queue
+
+def _run_analytics(env, agent, num_games, seed, chunk_size, messages, cancelled):
+    """Worker process: simulate games, report progress, then write the plots
+
+    Sends ``("progress", games done, total, running mean)`` after every
+    chunk, ``("stats", dict)`` once all games are played and ``("done",
+    files)`` after the plots are written, or ``("error", message)``.
+    """
+    try:
+        from analysis import expected_turns
+        from simulation import iter_simulations
+        from streaming_stats import RunningStats
+
+        stats = RunningStats()
+        for steps in iter_simulations(env, agent.policy, num_games, exploration_rate=0.1,
+                                      seed=seed, chunk_size=chunk_size):
+            if cancelled.is_set():
+                # Don't wait to flush messages nobody will read
+                messages.cancel_join_thread()
+                return
+            stats.update(steps)
+            messages.put(("progress", stats.count, num_games, stats.mean))
+
+        messages.put(("stats", {
+            "min": stats.min,
+            "max": stats.max,
+            "mean": stats.mean,
+            "std": stats.std,
+            "exact": float(expected_turns(env, agent.policy, exploration_rate=0.1)[1]),
+        }))
+
+        # The plotting helpers select matplotlib's non-interactive Agg backend
+        from plotting import plot_steps_distribution, visualize_values
+        plot_steps_distribution(stats)
+        if cancelled.is_set():
+            messages.cancel_join_thread()
+            return
+        visualize_values(agent, env)
+        messages.put(("done", ["steps_distribution.png", "value_iteration_results.png"]))
+    except Exception as error:
+        messages.put(("error", f"{type(error).__name__}: {error}"))
+
+class AnalyticsPipeline:
+    """Game statistics and plots computed in a background process
+
+    The GUI calls ``poll`` once per frame to pick up progress without ever
+    blocking, and ``restart`` or ``cancel`` when the board is reset or the
+    window closes. Each run gets its own queue, so messages from a
+    cancelled run can never be mistaken for those of the next one.
+    """
+
+    def __init__(self, env, agent, num_games=1000, seed=None, chunk_size=None):
+        self.env = env
+        self.agent = agent
+        self.num_games = num_games
+        self.seed = seed
+        # About 20 progress updates per run
+        self.chunk_size = chunk_size or max(1000, num_games // 20)
+        # The GUI process has SDL initialized, which a forked child must not inherit
+        self.context = multiprocessing.get_context("spawn")
+
+        self.process = None
+        self.messages = None
+        self.cancelled = None
+        self.status = "idle"  # "idle", "running", "done", "cancelled" or "error"
+        self.games_done = 0
+        self.mean_steps = None
+        self.stats = None
+        self.files = []
+        self.error = None
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    def start(self):
+        """Start a new run in a fresh worker process"""
+        self.messages = self.context.Queue()
+        self.cancelled = self.context.Event()
+        self.process = self.context.Process(
+            target=_run_analytics,
+            args=(self.env, self.agent, self.num_games, self.seed, self.chunk_size,
+                  self.messages, self.cancelled),
+            daemon=True)
+        self.process.start()
+        self.status = "running"
+        self.games_done = 0
+        self.mean_steps = None
+        self.stats = None
+        self.files = []
+        self.error = None
+
+    def poll(self):
+        """Apply every message the worker has sent so far; True if anything changed"""
+        if self.messages is None:
+            return False
+        changed = False
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+            kind = message[0]
+            if kind == "progress":
+                self.games_done, _, self.mean_steps = message[1:]
+            elif kind == "stats":
+                self.stats = message[1]
+            elif kind == "done":
+                self.files = message[1]
+                self.status = "done"
+            elif kind == "error":
+                self.error = message[1]
+                self.status = "error"
+
+        if self.status != "running" and self.process is not None:
+            # Reap the worker once it has exited; a slow exit is picked up by a later poll
+            self.process.join(timeout=0)
+            if not self.process.is_alive():
+                self.process = None
+        elif self.running and not self.process.is_alive() and self.messages.empty():
+            # Killed without getting to report anything
+            self.error = f"worker exited with code {self.process.exitcode}"
+            self.status = "error"
+            self.process = None
+            changed = True
+        return changed
+
+    def cancel(self, timeout=0.1):
+        """Stop the current run, terminating the worker if it does not stop in time"""
+        if self.process is not None:
+            self.cancelled.set()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
+        self.messages = None
+        if self.running:
+            self.status = "cancelled"
+
+    def restart(self):
+        """Cancel the current run, if any, and queue a new one"""
+        self.cancel()
+        self.start()
+
+    def status_lines(self):
+        """Up to two short lines describing the run for the stats panel"""
+        if self.status == "idle":
+            return []
+        if self.status == "error":
+            return ["Analytics failed", self.error[:28]]
+        if self.status == "cancelled":
+            return ["Analytics cancelled"]
+
+        if self.stats is None:
+            lines = [f"Analytics: {self.games_done}/{self.num_games} games"]
+            if self.mean_steps is not None:
+                lines.append(f"Mean steps so far: {self.mean_steps:.2f}")
+        else:
+            lines = ["Analytics: plots written" if self.status == "done" else "Analytics: writing plots...",
+                     f"Mean steps: {self.stats['mean']:.2f} (exact {self.stats['exact']:.2f})"]
+        return lines
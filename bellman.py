@@ -0,0 +1,276 @@
+import heapq
+import time
+from collections import defaultdict
+import numpy as np
+
+METHODS = ("jacobi", "gauss-seidel", "policy-iteration", "prioritized")
+
+# Bump whenever a change to the solver changes its results
+SOLVER_VERSION = 1
+
+def bellman_backup(env, values, gamma, states):
+    """Back up the given states over all six rolls at once
+
+    Returns the best action value and the best roll (1-6) for each state.
+    """
+    if env.next_state is None:
+        return _banded_backup(env, values, gamma, states)
+
+    next_states, rewards = env.transition_rows(states)
+    q = rewards + gamma * values[next_states]
+    best = q.argmax(axis=1)
+    return q[np.arange(len(best)), best], best + 1
+
+def _banded_backup(env, values, gamma, states):
+    """Bellman backup for sparse boards, where the six moves are a band of cells
+
+    Values are computed once per landing cell in the span of ``states``
+    (which must be sorted), then each roll is an offset into that span.
+    """
+    lo, hi = int(states[0]), int(states[-1])
+    cells = np.arange(lo + 1, hi + 7, dtype=np.int32)
+    if hi + 6 > env.board_size:
+        cells = np.where(cells > env.board_size, 2 * env.board_size - cells, cells)
+    landing_values = env.landing_reward[cells] + gamma * values[env.jump[cells]]
+
+    offsets = states - lo
+    best_values = landing_values[offsets]
+    best_actions = np.ones(len(states), dtype=np.uint8)
+    for roll in range(2, 7):
+        candidate = landing_values[offsets + roll - 1]
+        better = candidate > best_values
+        best_values = np.where(better, candidate, best_values)
+        best_actions = np.where(better, np.uint8(roll), best_actions)
+
+    return best_values, best_actions
+
+def _state_backup(env, values, gamma, state):
+    """Bellman backup of a single state with plain Python arithmetic
+
+    Much cheaper than a NumPy call for one state, which is what the
+    prioritized solver backs up at a time.
+    """
+    board_size = env.board_size
+    best_value, best_action = -np.inf, 1
+    for roll in range(1, 7):
+        cell = state + roll
+        if cell > board_size:
+            cell = 2 * board_size - cell
+        value = float(env.landing_reward[cell]) + gamma * float(values[env.jump[cell]])
+        if value > best_value:
+            best_value, best_action = value, roll
+    return best_value, best_action
+
+def _jacobi(env, values, policy, states, gamma, theta, max_iterations, record, block_size):
+    """Synchronous sweeps: every state is backed up from the previous values
+
+    States are backed up in blocks into a separate buffer, which keeps the
+    temporaries small on large boards.
+    """
+    iterations = 0
+    new_values = np.empty(len(states), dtype=values.dtype)
+    while True:
+        for start in range(0, len(states), block_size):
+            block = states[start:start + block_size]
+            new_values[start:start + block_size], policy[block] = bellman_backup(env, values, gamma, block)
+        residual = float(np.max(np.abs(new_values - values[states]), initial=0.0))
+        values[states] = new_values
+        iterations += 1
+        record(iterations * len(states), residual)
+        if residual < theta or iterations == max_iterations:
+            return iterations, iterations * len(states)
+
+def _gauss_seidel(env, values, policy, states, gamma, theta, max_iterations, record, block_size):
+    """In-place sweeps from the last cell backwards, one block of states at a time
+
+    Moves mostly go forward, so sweeping towards the start lets each block
+    read values that were already updated earlier in the same sweep.
+    """
+    iterations = 0
+    while True:
+        residual = 0.0
+        for stop in range(len(states), 0, -block_size):
+            block = states[max(0, stop - block_size):stop]
+            best_values, best_actions = bellman_backup(env, values, gamma, block)
+            residual = max(residual, float(np.max(np.abs(best_values - values[block]))))
+            values[block] = best_values
+            policy[block] = best_actions
+        iterations += 1
+        record(iterations * len(states), residual)
+        if residual < theta or iterations == max_iterations:
+            return iterations, iterations * len(states)
+
+def _policy_iteration(env, values, policy, states, gamma, theta, max_iterations, record, eval_sweeps):
+    """Modified policy iteration: greedy improvement plus partial evaluation
+
+    Evaluation updates count as backups too.
+    """
+    iterations = 0
+    backups = 0
+    while True:
+        # Policy improvement
+        best_values, best_actions = bellman_backup(env, values, gamma, states)
+        residual = float(np.max(np.abs(best_values - values[states]), initial=0.0))
+        values[states] = best_values
+        policy[states] = best_actions
+        iterations += 1
+        backups += len(states)
+        record(backups, residual)
+        if residual < theta or iterations == max_iterations:
+            return iterations, backups
+
+        # Partial policy evaluation with the transitions of the chosen rolls
+        next_states, rewards = env.transition(states, best_actions)
+        for _ in range(eval_sweeps):
+            values[states] = rewards + gamma * values[next_states]
+        backups += eval_sweeps * len(states)
+
+def predecessor_lists(env, states, block_size=65536):
+    """Predecessors of every cell among the given states, from their transition rows
+
+    Returns CSR arrays ``(indptr, sources)``: the distinct states that can
+    move to cell ``c`` with some roll are ``sources[indptr[c]:indptr[c + 1]]``,
+    in increasing order.
+    """
+    n = env.board_size + 1
+    keys = []
+    for start in range(0, len(states), block_size):
+        block = states[start:start + block_size]
+        next_states = env.transition_rows(block)[0]
+        keys.append((next_states.astype(np.int64) * n + block[:, None]).ravel())
+    targets, sources = np.divmod(np.unique(np.concatenate(keys)), n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=n), out=indptr[1:])
+    return indptr, sources
+
+def _prioritized_sweeping(env, values, policy, states, active, gamma, theta, max_backups, record,
+                          seeds=None):
+    """Asynchronous backups in order of Bellman error
+
+    Keeps the last computed Bellman error of every state and a heap of the
+    states whose error is at least theta; heap entries whose error has
+    changed since they were pushed are skipped. After a state is backed
+    up, the errors of its predecessors are recomputed.
+
+    Without ``seeds`` every state starts on the heap, and predecessors come
+    from lists built from the transition table. With ``seeds`` only those
+    states do, as when re-solving after a small change, and predecessors
+    are looked up in the jump map instead so nothing proportional to the
+    board is built: the cells that jump to a state (or the state itself)
+    and the states whose rolls land on those cells.
+
+    The residual is recorded ten times every ``len(states)`` backups, the
+    work of one sweep. Returns the backup count, the number of error evaluations spent on
+    prioritizing and the backups per state.
+    """
+    board_size = env.board_size
+    if seeds is None:
+        seeds = states
+        indptr, sources = predecessor_lists(env, states)
+
+        def predecessors(state):
+            return sources[indptr[state]:indptr[state + 1]].tolist()
+    else:
+        arrivals = defaultdict(list)  # Jump end -> jump starts
+        for start, end in list(env.snakes.items()) + list(env.ladders.items()):
+            arrivals[end].append(start)
+
+        def predecessors(state):
+            cells = arrivals.get(state, [])
+            if env.jump[state] == state:
+                cells = cells + [state]
+            return env.landing_sources(cells)
+
+    errors = np.zeros(board_size + 1)
+    backups_per_state = np.zeros(board_size + 1, dtype=np.int64)
+    heap = []
+    evaluations = 0
+
+    def check(states):
+        """Recompute the Bellman error of the given states and queue the large ones"""
+        nonlocal evaluations
+        for state in states:
+            if not active[state]:
+                continue
+            error = abs(_state_backup(env, values, gamma, state)[0] - float(values[state]))
+            errors[state] = error
+            evaluations += 1
+            if error >= theta:
+                heapq.heappush(heap, (-error, state))
+
+    # Seed the heap with one vectorized pass
+    seeds = np.unique(np.asarray(seeds, dtype=np.int64))
+    seeds = seeds[active[seeds]]
+    if seeds.size:
+        best_values, _ = bellman_backup(env, values, gamma, seeds)
+        errors[seeds] = np.abs(best_values - values[seeds])
+        evaluations += seeds.size
+        heap = [(-error, state) for state, error in zip(seeds.tolist(), errors[seeds].tolist())
+                if error >= theta]
+        heapq.heapify(heap)
+    sample_every = max(1, len(states) // 10)
+    backups = 0
+    while heap and backups != max_backups:
+        error, state = heapq.heappop(heap)
+        if -error != errors[state]:
+            continue  # Stale entry
+        if backups % sample_every == 0:
+            record(backups, -error)
+
+        values[state], policy[state] = _state_backup(env, values, gamma, state)
+        errors[state] = 0.0
+        backups += 1
+        backups_per_state[state] += 1
+        check(predecessors(state))
+
+    record(backups, float(errors[active].max(initial=0.0)))
+    return backups, evaluations, backups_per_state
+
+def solve(env, values, policy, active, gamma=0.9, theta=1e-6, method="jacobi",
+          max_iterations=None, block_size=None, eval_sweeps=20, seeds=None):
+    """Solve the Bellman optimality equations in place over the active states
+
+    ``values`` and ``policy`` are updated in place; states where ``active`` is
+    False keep their current value. ``block_size`` defaults to 65536 states
+    per backup for Jacobi and 6 (one die's reach) for Gauss-Seidel. The
+    "prioritized" method starts from the ``seeds`` states, by default all
+    active ones, and ``max_iterations`` caps its backups instead of sweeps.
+
+    Returns a dict with the method, the iteration count (sweeps, or
+    backups for "prioritized"), the final residual, the total state
+    backups, the wall time in seconds and the residual trajectory as
+    ``(backups, seconds, residual)`` after every sweep (ten times every
+    ``len(states)`` backups for "prioritized"). "prioritized" also reports
+    the Bellman error evaluations spent on prioritizing and the backups of
+    every state.
+    """
+    start_time = time.perf_counter()
+    states = np.flatnonzero(active)
+    info = {"method": method}
+    trajectory = []
+
+    def record(backups, residual):
+        trajectory.append((backups, time.perf_counter() - start_time, residual))
+
+    args = (env, values, policy, states, gamma, theta, max_iterations, record)
+    if method == "jacobi":
+        iterations, backups = _jacobi(*args, block_size or 65536)
+    elif method == "gauss-seidel":
+        iterations, backups = _gauss_seidel(*args, block_size or 6)
+    elif method == "policy-iteration":
+        iterations, backups = _policy_iteration(*args, eval_sweeps)
+    elif method == "prioritized":
+        backups, info["evaluations"], info["backups_per_state"] = _prioritized_sweeping(
+            env, values, policy, states, active, gamma, theta, max_iterations, record, seeds)
+        iterations = backups
+    else:
+        raise ValueError(f"Unknown solver method {method!r}, expected one of {METHODS}")
+
+    info.update({
+        "iterations": iterations,
+        "residual": trajectory[-1][2],
+        "backups": backups,
+        "wall_time": time.perf_counter() - start_time,
+        "trajectory": trajectory,
+    })
+    return info
@@ -0,0 +1,271 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from agent import QLearningAgent
+from bellman import METHODS
+from environment import SnakeAndLadderEnv, random_layout
+from simulation import iter_simulations
+from streaming_stats import DistinctCounter, RunningStats
+from value_iteration_agent import ValueIterationAgent
+
+# Wall-clock budget in seconds for each main.py subcommand, from process
+# start to exit, with a warm policy cache
+STARTUP_BUDGETS = {
+    ("--help",): 0.3,
+    ("play", "--max-frames", "1"): 1.5,
+    ("solve",): 1.0,
+    ("simulate", "--games", "1000", "--seed", "0"): 1.5,
+    ("plot", "--games", "1000", "--seed", "0"): 4.0,
+}
+
+def bench_large_board(sizes=(10**4, 10**5, 10**6), method="jacobi", seed=0):
+    """Solve time and peak memory of sparse boards of increasing size"""
+    print(f"{'cells':>10} {'jumps':>8} {'build s':>8} {'solve s':>8} {'iters':>6} "
+          f"{'peak MB':>8} {'B/cell':>7}")
+    for board_size in sizes:
+        # One snake and one ladder per 50 cells
+        snakes, ladders = random_layout(board_size, board_size // 50, board_size // 50, seed=seed)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        env = SnakeAndLadderEnv(board_size, snakes, ladders, sparse=True)
+        build_time = time.perf_counter() - start
+        agent = ValueIterationAgent(env, method=method)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        info = agent.solve_info
+        print(f"{board_size:>10} {len(snakes) + len(ladders):>8} {build_time:>8.3f} "
+              f"{info['wall_time']:>8.3f} {info['iterations']:>6} "
+              f"{peak / 2**20:>8.1f} {peak / board_size:>7.1f}")
+
+def bench_prioritized(sizes=(100, 10**3, 10**4, 10**5), seed=0):
+    """Bellman backups and time of prioritized sweeping vs the full-sweep solvers"""
+    print(f"{'cells':>8} {'method':>17} {'backups':>10} {'checks':>9} {'per state':>9} "
+          f"{'max':>4} {'to 1e-3':>9} {'seconds':>8}")
+    for board_size in sizes:
+        if board_size == 100:
+            env_args = (100, None, None, False)  # The classic board
+        else:
+            snakes, ladders = random_layout(board_size, board_size // 50, board_size // 50, seed=seed)
+            env_args = (board_size, snakes, ladders, True)
+        for method in METHODS:
+            agent = ValueIterationAgent(SnakeAndLadderEnv(*env_args), method=method)
+            info = agent.solve_info
+            states = agent.active_states().sum()
+            # Backups until the residual first dropped below 1e-3
+            to_tolerance = next((backups for backups, _, residual in info["trajectory"]
+                                 if residual < 1e-3), info["backups"])
+            max_per_state = info["backups_per_state"].max() if "backups_per_state" in info else "-"
+            print(f"{board_size:>8} {method:>17} {info['backups']:>10} {info.get('evaluations', '-'):>9} "
+                  f"{info['backups'] / states:>9.1f} {max_per_state:>4} {to_tolerance:>9} "
+                  f"{info['wall_time']:>8.3f}")
+
+def bench_incremental(sizes=(10**4, 10**5, 10**6), edits=4, seed=0):
+    """Backups and time of re-solving after one-jump edits vs solving the edited board from scratch"""
+    print(f"{'cells':>10} {'edit':>22} {'backups':>9} {'full':>11} {'ratio':>8} "
+          f"{'resolve s':>9} {'full s':>7}")
+    rng = np.random.default_rng(seed)
+    for board_size in sizes:
+        snakes, ladders = random_layout(board_size, board_size // 50, board_size // 50, seed=seed)
+        agent = ValueIterationAgent(SnakeAndLadderEnv(board_size, snakes, ladders, sparse=True))
+        for edit in range(edits):
+            env = agent.env
+            taken = set(env.snakes) | set(env.ladders) | set(env.snakes.values()) | set(env.ladders.values())
+            start = int(rng.integers(board_size // 4, board_size - 60))
+            while start in taken:
+                start += 1
+            snakes, ladders = dict(env.snakes), dict(env.ladders)
+            # Alternate between a short new snake and a short new ladder
+            if edit % 2 == 0:
+                snakes[start] = start - int(rng.integers(5, 50))
+                label = f"snake {start}->{snakes[start]}"
+            else:
+                ladders[start] = start + int(rng.integers(5, 50))
+                label = f"ladder {start}->{ladders[start]}"
+
+            info = agent.update_layout(snakes, ladders)
+            full = ValueIterationAgent(SnakeAndLadderEnv(board_size, snakes, ladders, sparse=True)).solve_info
+            ratio = f"{full['backups'] / info['backups']:.0f}x" if info["backups"] else "-"
+            print(f"{board_size:>10} {label:>22} {info['backups']:>9} {full['backups']:>11} {ratio:>8} "
+                  f"{info['wall_time']:>9.4f} {full['wall_time']:>7.3f}")
+
+def bench_qlearning(num_episodes=20000, num_envs=(256, 1024, 4096), seed=0):
+    """Q-learning training throughput, one episode at a time vs vectorized"""
+    env = SnakeAndLadderEnv()
+
+    agent = QLearningAgent(env)
+    start = time.perf_counter()
+    samples = sum(agent.train(num_episodes))
+    baseline = samples / (time.perf_counter() - start)
+    print(f"{'train':>22} {baseline:>12,.0f} steps/s")
+
+    for envs in num_envs:
+        agent = QLearningAgent(env)
+        start = time.perf_counter()
+        samples = agent.train_vectorized(num_episodes, num_envs=envs, seed=seed).sum()
+        throughput = samples / (time.perf_counter() - start)
+        print(f"{f'train_vectorized({envs})':>22} {throughput:>12,.0f} steps/s "
+              f"{throughput / baseline:>6.1f}x")
+
+def bench_streaming_stats(num_games=(10**3, 10**5, 10**7), chunk_size=100_000, seed=0):
+    """Peak memory of summarizing simulated games, which should not grow with the game count"""
+    env = SnakeAndLadderEnv()
+    agent = ValueIterationAgent(env)
+    print(f"{'games':>10} {'seconds':>8} {'games/s':>12} {'peak MB':>8} {'mean':>6} {'paths':>8}")
+    for games in num_games:
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = RunningStats()
+        unique_paths = DistinctCounter()
+        for steps, hashes in iter_simulations(env, agent.policy, games, seed=seed,
+                                              chunk_size=chunk_size, hash_paths=True):
+            stats.update(steps)
+            unique_paths.update(hashes)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{games:>10} {elapsed:>8.2f} {games / elapsed:>12,.0f} {peak / 2**20:>8.1f} "
+              f"{stats.mean:>6.2f} {unique_paths.estimate():>8.0f}")
+
+def bench_sessions(num_games=10**6, env_games=10**4, seed=0):
+    """Bytes per live game as environment instances vs rows of a SessionStore on a shared Board"""
+    from sessions import SessionStore
+
+    env = SnakeAndLadderEnv()
+    tracemalloc.start()
+    envs = [SnakeAndLadderEnv() for _ in range(env_games)]
+    env_bytes = tracemalloc.get_traced_memory()[0] / env_games
+    del envs
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    board = env.freeze()
+    store = SessionStore(board, capacity=num_games, seed=seed)
+    sessions = store.open(num_games)
+    store_bytes = tracemalloc.get_traced_memory()[0] / num_games
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    moves = 0
+    while store.positions[sessions].min() < board.board_size:
+        moves += int((store.positions[sessions] < board.board_size).sum())
+        store.move(sessions, store.roll(sessions))
+    elapsed = time.perf_counter() - start
+    print(f"{'SnakeAndLadderEnv':>18} {env_bytes:>8,.0f} B/game ({env_games} games)")
+    print(f"{'SessionStore':>18} {store_bytes:>8,.1f} B/game ({num_games} games)")
+    print(f"Played all {num_games} games to the end: {moves / elapsed:,.0f} moves/s")
+
+def bench_finite_horizon(sizes=(10**4, 10**5, 10**6), horizons=(1000, 5000), seed=0,
+                         max_table_bytes=2 * 10**9):
+    """Backward induction time for win-within-K policies on sparse boards"""
+    from finite_horizon_agent import FiniteHorizonAgent
+
+    print(f"{'cells':>10} {'turns':>6} {'solve s':>8} {'ns/cell/turn':>13} {'table MB':>9} {'P(win)':>8}")
+    for board_size in sizes:
+        snakes, ladders = random_layout(board_size, board_size // 50, board_size // 50, seed=seed)
+        env = SnakeAndLadderEnv(board_size, snakes, ladders, sparse=True)
+        for horizon in horizons:
+            if horizon * (board_size + 1) > max_table_bytes:
+                continue
+            agent = FiniteHorizonAgent(env, horizon, store_values=False)
+            per_cell = agent.solve_time / (horizon * board_size) * 1e9
+            print(f"{board_size:>10} {horizon:>6} {agent.solve_time:>8.2f} {per_cell:>13.2f} "
+                  f"{agent.policy.nbytes / 1e6:>9.1f} {agent.win_probability(1):>8.4f}")
+
+def bench_layout_evaluation(sizes=(100, 300, 1000), proposals=2000, seed=0):
+    """Layout evaluations per second, Woodbury updates vs solving every candidate from scratch"""
+    from layout_optimizer import LayoutEvaluator, _propose, layout_moments
+
+    rng = np.random.default_rng(seed)
+    print(f"{'cells':>6} {'incremental/s':>14} {'full/s':>8} {'speedup':>8}")
+    for board_size in sizes:
+        snakes, ladders = random_layout(board_size, board_size // 10, board_size // 12, seed=seed)
+        env = SnakeAndLadderEnv(board_size, snakes, ladders)
+        evaluator = LayoutEvaluator(env)
+        moves = [move for move in (_propose(env.snakes, env.ladders, board_size, rng)
+                                   for _ in range(proposals)) if move is not None]
+
+        start = time.perf_counter()
+        for _, _, changes in moves:
+            evaluator.evaluate(changes)
+        incremental = len(moves) / (time.perf_counter() - start)
+
+        count = max(1, 20000 // board_size)
+        start = time.perf_counter()
+        for new_snakes, new_ladders, _ in moves[:count]:
+            layout_moments(SnakeAndLadderEnv(board_size, new_snakes, new_ladders))
+        full = count / (time.perf_counter() - start)
+        print(f"{board_size:>6} {incremental:>14,.0f} {full:>8,.0f} {incremental / full:>7.0f}x")
+
+def bench_startup(repeats=3):
+    """Time each main.py subcommand in a fresh interpreter against its budget"""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+    # The policy cache and plots are written to a scratch directory, not the repository
+    with tempfile.TemporaryDirectory() as directory:
+        # Warm the policy cache so "play" measures startup, not solving
+        subprocess.run(command + ["solve"], cwd=directory, env=env, check=True, capture_output=True)
+
+        failures = 0
+        print(f"{'command':>40} {'best s':>7} {'budget s':>8}")
+        for args, budget in STARTUP_BUDGETS.items():
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                subprocess.run(command + list(args), cwd=directory, env=env, check=True,
+                               capture_output=True)
+                best = min(best, time.perf_counter() - start)
+            ok = best <= budget
+            failures += not ok
+            print(f"{' '.join(args):>40} {best:>7.3f} {budget:>8.1f} {'PASS' if ok else 'FAIL'}")
+    return failures
+
+def bench_server(port=8799, clients=(1, 10, 100), moves=20_000, idle_sessions=100_000):
+    """Move latency and throughput of a game server subprocess, and its memory per idle session"""
+    import asyncio
+    from server import run_load
+
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+    # The server's policy cache goes to a scratch directory, not the repository
+    with tempfile.TemporaryDirectory() as directory:
+        subprocess.run(command + ["solve"], cwd=directory, check=True, capture_output=True)
+        server = subprocess.Popen(command + ["serve", "--port", str(port)], cwd=directory,
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            server.stdout.readline()  # Wait for "Serving on ..."
+            print(f"{'clients':>8} {'moves/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+            for count in clients:
+                result = asyncio.run(run_load(port=port, clients=count, moves=moves // count))
+                print(f"{count:>8} {result['moves_per_second']:>10,.0f} {result['p50_ms']:>8.3f} "
+                      f"{result['p99_ms']:>8.3f}")
+            result = asyncio.run(run_load(port=port, clients=1, moves=1, idle_sessions=idle_sessions))
+            before, after = result["max_rss_kb"]
+            print(f"{idle_sessions} idle sessions: {(after - before) * 1024 / idle_sessions:.0f} B each")
+        finally:
+            server.terminate()
+            server.wait()
+
+BENCHMARKS = {
+    "incremental": bench_incremental,
+    "prioritized": bench_prioritized,
+    "large-board": bench_large_board,
+    "qlearning": bench_qlearning,
+    "streaming-stats": bench_streaming_stats,
+    "startup": bench_startup,
+    "server": bench_server,
+    "sessions": bench_sessions,
+    "finite-horizon": bench_finite_horizon,
+    "layout-evaluation": bench_layout_evaluation,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snake and Ladder performance benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark]()
@@ -1,35 +1,161 @@
+from types import MappingProxyType
 import numpy as np
 
+# Dice rolls, as a row to broadcast against a column of states
+ROLLS = np.arange(1, 7, dtype=np.int32)
+
+def random_layout(board_size, num_snakes, num_ladders, seed=None):
+    """Generate random snakes and ladders for a board of any size
+
+    Returns ``(snakes, ladders)`` dicts. No snake or ladder starts on the
+    first or last cell, or on the end of another snake or ladder.
+    """
+    rng = np.random.default_rng(seed)
+    starts = rng.choice(np.arange(2, board_size), num_snakes + num_ladders, replace=False)
+    snake_starts = starts[:num_snakes]
+    ladder_starts = starts[num_snakes:]
+    
+    # Snakes go down, ladders go up; redraw ends that land on another start
+    snake_ends = np.empty_like(snake_starts)
+    ladder_ends = np.empty_like(ladder_starts)
+    redraw_snakes = np.ones(num_snakes, dtype=bool)
+    redraw_ladders = np.ones(num_ladders, dtype=bool)
+    while redraw_snakes.any() or redraw_ladders.any():
+        snake_ends[redraw_snakes] = rng.integers(1, snake_starts[redraw_snakes])
+        ladder_ends[redraw_ladders] = rng.integers(ladder_starts[redraw_ladders] + 1, board_size + 1)
+        redraw_snakes = np.isin(snake_ends, starts)
+        redraw_ladders = np.isin(ladder_ends, starts)
+    
+    snakes = dict(zip(snake_starts.tolist(), snake_ends.tolist()))
+    ladders = dict(zip(ladder_starts.tolist(), ladder_ends.tolist()))
+    return snakes, ladders
+
 class SnakeAndLadderEnv:
-    def __init__(self, board_size=100):
+    def __init__(self, board_size=100, snakes=None, ladders=None, sparse=False):
         self.board_size = board_size
         self.current_position = 1
         
+        # Sparse mode skips the dense [state, roll] tables for very large boards
+        self.sparse = sparse
+        
         # Define snakes (start: end)
-        self.snakes = {
-            16: 6,
-            47: 26,
-            49: 11,
-            56: 53,
-            62: 19,
-            64: 60,
-            87: 24,
-            93: 73,
-            95: 75,
-            98: 78
-        }
+        if snakes is None:
+            snakes = {
+                16: 6,
+                47: 26,
+                49: 11,
+                56: 53,
+                62: 19,
+                64: 60,
+                87: 24,
+                93: 73,
+                95: 75,
+                98: 78
+            }
+        self.snakes = dict(snakes)
         
         # Define ladders (start: end)
-        self.ladders = {
-            4: 14,
-            9: 31,
-            21: 42,
-            28: 84,
-            36: 44,
-            51: 67,
-            71: 91,
-            80: 100
-        }
+        if ladders is None:
+            ladders = {
+                4: 14,
+                9: 31,
+                21: 42,
+                28: 84,
+                36: 44,
+                51: 67,
+                71: 91,
+                80: 100
+            }
+        self.ladders = dict(ladders)
+        
+        # Compile the board into lookup tables indexed by [state, roll - 1]
+        self.build_transition_table()
+    
+    def build_transition_table(self):
+        """Compile snakes, ladders and bounce-back into next_state/reward tables
+        
+        Every board gets a per-cell jump map and landing reward. Moves are a
+        band of six cells past the current one, so in sparse mode those two
+        vectors are all that is stored and rows are rebuilt on demand.
+        """
+        # Resolve snakes and ladders with a per-cell jump map
+        self.jump = np.arange(self.board_size + 1, dtype=np.int32)
+        self.landing_reward = np.zeros(self.board_size + 1, dtype=np.float32 if self.sparse else float)
+        for jumps, reward in ((self.snakes, -0.5), (self.ladders, 0.5)):
+            starts = np.fromiter(jumps.keys(), dtype=np.int32, count=len(jumps))
+            ends = np.fromiter(jumps.values(), dtype=np.int32, count=len(jumps))
+            self.jump[starts] = ends
+            self.landing_reward[starts] = reward  # Negative for snakes, positive for ladders
+        self.landing_reward[self.jump == self.board_size] = 1.0  # Positive reward for winning
+        
+        self.next_state = None
+        self.reward = None
+        if not self.sparse:
+            states = np.arange(self.board_size + 1, dtype=np.int32)
+            self.next_state, self.reward = self.transition_rows(states)
+    
+    def update_layout(self, snakes=None, ladders=None):
+        """Replace the snakes and/or ladders, patching only the cells that changed
+        
+        Returns the sorted array of cells whose jump or landing reward changed.
+        """
+        old_snakes, old_ladders = self.snakes, self.ladders
+        if snakes is not None:
+            self.snakes = dict(snakes)
+        if ladders is not None:
+            self.ladders = dict(ladders)
+        changed = sorted({cell for old, new in ((old_snakes, self.snakes), (old_ladders, self.ladders))
+                          for cell in old.keys() | new.keys() if old.get(cell) != new.get(cell)})
+        changed = np.array(changed, dtype=np.int32)
+        if changed.size == 0:
+            return changed
+        
+        # Same rules as build_transition_table, for the changed cells only
+        for cell in changed.tolist():
+            if cell in self.snakes:
+                self.jump[cell], self.landing_reward[cell] = self.snakes[cell], -0.5
+            elif cell in self.ladders:
+                self.jump[cell], self.landing_reward[cell] = self.ladders[cell], 0.5
+            else:
+                self.jump[cell], self.landing_reward[cell] = cell, 0.0
+            if self.jump[cell] == self.board_size:
+                self.landing_reward[cell] = 1.0
+        
+        # Rebuild the dense rows of every state that can land on a changed cell
+        if self.next_state is not None:
+            sources = np.array(sorted(self.landing_sources(changed)), dtype=np.int32)
+            self.next_state[sources], self.reward[sources] = self._move(sources[:, None], ROLLS[None, :])
+        return changed
+    
+    def landing_sources(self, cells):
+        """States that land on any of the given cells with some roll, before jumping"""
+        n = self.board_size
+        sources = set()
+        for cell in np.asarray(cells).tolist():
+            for roll in range(1, 7):
+                if 0 <= cell - roll < n:
+                    sources.add(cell - roll)
+                # Overshooting the last cell bounces back onto it from 2n - cell - roll
+                bounced = 2 * n - cell - roll
+                if n - roll < bounced < n:
+                    sources.add(bounced)
+        return sources
+    
+    def transition(self, states, actions):
+        """Vectorized lookup of next states and rewards for states and rolls"""
+        return _transition(self, states, actions)
+    
+    def _move(self, states, actions):
+        """Compute moves from the jump map, without the dense tables"""
+        return _move(self, states, actions)
+    
+    def transition_rows(self, states):
+        """Next states and rewards for all six rolls from each of the given states"""
+        return _transition_rows(self, states)
+    
+    def freeze(self):
+        """Read-only snapshot of the current layout, to share between many games"""
+        return Board(self)
     
     def reset(self):
         """Reset the environment to initial state"""
@@ -38,27 +164,13 @@ class SnakeAndLadderEnv:
     
     def step(self, action):
         """Take a step in the environment"""
-        # Move the player
-        new_position = self.current_position + action
-        
-        # Check if the new position is beyond the board
-        if new_position > self.board_size:
-            new_position = self.board_size - (new_position - self.board_size)
-        
-        # Check for snakes and ladders
-        if new_position in self.snakes:
-            new_position = self.snakes[new_position]
-            reward = -0.5  # Negative reward for landing on a snake
-        elif new_position in self.ladders:
-            new_position = self.ladders[new_position]
-            reward = 0.5  # Positive reward for landing on a ladder
-        else:
-            reward = 0.0  # Neutral reward for normal move
+        # Look up the move in the compiled transition table
+        new_position, reward = self.transition(self.current_position, int(action))
+        new_position = int(new_position)
+        reward = float(reward)
         
         # Check if the game is over
         done = new_position == self.board_size
-        if done:
-            reward = 1.0  # Positive reward for winning
         
         # Update current position
         self.current_position = new_position
@@ -71,4 +183,73 @@ class SnakeAndLadderEnv:
     
     def get_state(self):
         """Get current state"""
-        return self.current_position 
\ No newline at end of file
+        return self.current_position 
+
+
+class Board:
+    """Read-only compiled layout that any number of games can share
+
+    A snapshot of an environment's snakes, ladders and transition tables,
+    so games only need to keep their own positions (see ``SessionStore``).
+    Later ``update_layout`` calls on the environment do not change it.
+    """
+    
+    __slots__ = ("board_size", "sparse", "snakes", "ladders", "jump", "landing_reward",
+                 "next_state", "reward")
+    
+    def __init__(self, env):
+        self.board_size = env.board_size
+        self.sparse = env.sparse
+        self.snakes = MappingProxyType(dict(env.snakes))
+        self.ladders = MappingProxyType(dict(env.ladders))
+        self.jump = _read_only(env.jump)
+        self.landing_reward = _read_only(env.landing_reward)
+        self.next_state = None if env.next_state is None else _read_only(env.next_state)
+        self.reward = None if env.reward is None else _read_only(env.reward)
+    
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"Board is read-only, cannot set {name!r}")
+        object.__setattr__(self, name, value)
+    
+    def transition(self, states, actions):
+        """Vectorized lookup of next states and rewards for states and rolls"""
+        return _transition(self, states, actions)
+    
+    def transition_rows(self, states):
+        """Next states and rewards for all six rolls from each of the given states"""
+        return _transition_rows(self, states)
+    
+    def reset(self):
+        """First cell of every game"""
+        return 1
+
+def _read_only(array):
+    array = array.copy()
+    array.setflags(write=False)
+    return array
+
+# Moves shared by SnakeAndLadderEnv and Board, which have the same tables
+
+def _transition(layout, states, actions):
+    if layout.next_state is not None:
+        return layout.next_state[states, actions - 1], layout.reward[states, actions - 1]
+    return _move(layout, states, actions)
+
+def _move(layout, states, actions):
+    # Move the player, bouncing back off the last cell
+    landing = states + actions
+    landing = np.where(landing > layout.board_size, 2 * layout.board_size - landing, landing)
+    next_states = layout.jump[landing]
+    rewards = layout.landing_reward[landing]
+    
+    # The final cell is absorbing
+    finished = np.broadcast_to(states == layout.board_size, next_states.shape)
+    next_states = np.where(finished, layout.board_size, next_states).astype(np.int32)
+    rewards = np.where(finished, 0.0, rewards).astype(rewards.dtype)
+    return next_states, rewards
+
+def _transition_rows(layout, states):
+    if layout.next_state is not None:
+        return layout.next_state[states], layout.reward[states]
+    return _transition(layout, np.asarray(states, dtype=np.int32)[:, None], ROLLS[None, :])
@@ -0,0 +1,100 @@
+from statistics import NormalDist
+import numpy as np
+from simulation import iter_simulations
+from streaming_stats import RunningStats
+
+def policy_specs(env, agent=None, q_agent=None, exploration_rates=(0.1, 0.0, 0.3)):
+    """Named ``(policy, exploration_rate)`` pairs for the usual comparison
+
+    Includes the value iteration policy at each exploration rate, the
+    Q-learning policy at the first one and a uniformly random player. The
+    first entry is the value iteration policy at the first rate, which
+    ``evaluate_policies`` compares the others against.
+    """
+    specs = {}
+    if agent is not None:
+        for rate in exploration_rates:
+            specs[f"value iteration, epsilon={rate:g}"] = (agent.get_policy(), rate)
+    if q_agent is not None:
+        specs[f"q-learning, epsilon={exploration_rates[0]:g}"] = (q_agent.get_policy(),
+                                                                  exploration_rates[0])
+    # Always exploring ignores the policy
+    specs["random"] = (np.ones(env.board_size + 1, dtype=np.int32), 1.0)
+    return specs
+
+def evaluate_policies(env, specs, ci_width=0.1, confidence=0.95, compare=False,
+                      batch_size=10_000, min_games=1000, max_games=10**7,
+                      common_random_numbers=True, seed=None):
+    """Estimate each policy's mean steps to win, simulating only as many games as needed
+
+    ``specs`` maps names to ``(policy, exploration_rate)``. Games are played
+    in batches of ``batch_size`` per policy until the ``confidence``
+    interval of every mean is narrower than ``ci_width`` steps, or, with
+    ``compare``, until that holds for every policy's difference to the
+    first one. ``max_games`` per policy caps the run.
+
+    With ``common_random_numbers`` every policy plays each batch on the same
+    dice streams, so game ``i`` of one policy is paired with game ``i`` of
+    every other and differences are estimated from the paired results.
+    Their variance is lower than that of independent runs by however much
+    the paired games stay correlated, most for policies that behave alike.
+
+    Returns ``(results, games)`` where ``results`` maps each name to a dict
+    with "mean", "half_width" and, with ``compare``, "difference" and
+    "difference_half_width", and ``games`` is the number played per policy.
+    """
+    names = list(specs)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    stats = {name: RunningStats() for name in names}
+    differences = {name: RunningStats(num_bins=None) for name in names[1:]}
+    batch_seeds = np.random.SeedSequence(seed)
+
+    def half_width(summary):
+        return z * (summary.variance / summary.count) ** 0.5
+
+    def difference_half_width(name):
+        if common_random_numbers:
+            return half_width(differences[name])
+        # Independent runs: the variances of the two means add up
+        return (half_width(stats[name]) ** 2 + half_width(stats[names[0]]) ** 2) ** 0.5
+
+    games = 0
+    while games < max_games:
+        n = min(batch_size, max_games - games)
+        if common_random_numbers:
+            shared = batch_seeds.spawn(1)[0]
+            seeds = [shared] * len(names)
+        else:
+            seeds = batch_seeds.spawn(len(names))
+
+        steps = {}
+        for name, batch_seed in zip(names, seeds):
+            policy, exploration_rate = specs[name]
+            steps[name] = np.concatenate(list(iter_simulations(
+                env, policy, n, exploration_rate, seed=batch_seed, chunk_size=n,
+                common_random_numbers=common_random_numbers)))
+            stats[name].update(steps[name])
+        if common_random_numbers:
+            for name in names[1:]:
+                differences[name].update(steps[name] - steps[names[0]])
+        games += n
+
+        if games < min_games:
+            continue
+        if compare:
+            widths = [2 * difference_half_width(name) for name in names[1:]]
+        else:
+            widths = [2 * half_width(stats[name]) for name in names]
+        if max(widths, default=0.0) <= ci_width:
+            break
+
+    results = {}
+    for name in names:
+        results[name] = {"mean": stats[name].mean, "half_width": half_width(stats[name])}
+        if compare and name != names[0]:
+            if common_random_numbers:
+                results[name]["difference"] = differences[name].mean
+            else:
+                results[name]["difference"] = stats[name].mean - stats[names[0]].mean
+            results[name]["difference_half_width"] = difference_half_width(name)
+    return results, games
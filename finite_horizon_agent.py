@@ -0,0 +1,104 @@
+import time
+import numpy as np
+
+class FiniteHorizonAgent:
+    """Plays to maximize the probability of winning within a budget of turns
+
+    Solved by backward induction over the turns left: with ``t`` turns left
+    the value of a cell is the best probability of reaching the final cell
+    within ``t`` turns, where the chosen roll is only taken with probability
+    ``1 - exploration_rate`` and a uniformly random one otherwise, as in
+    ``simulate_games``. The policy is a ``(horizon, cells)`` uint8 table,
+    ``policy[t - 1, s]`` being the roll from cell ``s`` with ``t`` turns left.
+    """
+
+    def __init__(self, env, horizon, exploration_rate=0.1, store_values=True):
+        self.env = env
+        self.horizon = horizon
+        self.exploration_rate = exploration_rate
+        self.solve_time = None  # Wall time of the backward induction, in seconds
+        self.policy = np.zeros((horizon, env.board_size + 1), dtype=np.uint8)
+        # values[t, s] is the probability of winning from s within t turns;
+        # without store_values only the row for the whole horizon is kept
+        dtype = np.float32 if env.sparse else float
+        self.values = np.zeros((horizon + 1, env.board_size + 1), dtype=dtype) if store_values else None
+        self.win_probabilities = None  # Row of values for the whole horizon
+
+        self.backward_induction()
+
+    def backward_induction(self):
+        """Fill in the policy and values from one turn left up to the horizon"""
+        start_time = time.perf_counter()
+        n = self.env.board_size
+        dtype = np.float32 if self.env.sparse else float
+
+        # Where every cell + roll ends up, bouncing back off the last cell
+        # and following snakes and ladders; a roll from s is index s + roll
+        cells = np.arange(n + 7, dtype=np.int32)
+        cells = np.where(cells > n, 2 * n - cells, cells)
+        targets = self.env.jump[cells].astype(np.intp)
+
+        values = np.zeros(n + 1, dtype=dtype)
+        values[n] = 1.0
+        if self.values is not None:
+            self.values[0] = values
+        chosen = dtype(1.0 - self.exploration_rate)
+        uniform = dtype(self.exploration_rate / 6.0)
+        # Buffers reused every turn, updated in place
+        best = np.empty(n + 1, dtype=dtype)
+        total = np.empty(n + 1, dtype=dtype)
+        better = np.empty(n + 1, dtype=bool)
+        change = np.empty(n + 1, dtype=np.uint8)
+        for turns_left in range(1, self.horizon + 1):
+            landing_values = values[targets]
+            best[:] = landing_values[1:n + 2]
+            total[:] = best
+            actions = np.ones(n + 1, dtype=np.uint8)
+            for roll in range(2, 7):
+                candidate = landing_values[roll:roll + n + 1]
+                total += candidate
+                np.greater(candidate, best, out=better)
+                np.maximum(best, candidate, out=best)
+                # actions = where(better, roll, actions) without branching on
+                # the mask, which is slow when it is unpredictable; wraps mod 256
+                np.subtract(np.uint8(roll), actions, out=change)
+                change *= better.view(np.uint8)
+                actions += change
+
+            best *= chosen
+            total *= uniform
+            values = best + total
+            values[n] = 1.0  # Already won
+            actions[n] = 0
+            self.policy[turns_left - 1] = actions
+            if self.values is not None:
+                self.values[turns_left] = values
+
+        self.win_probabilities = values
+        self.solve_time = time.perf_counter() - start_time
+        return self.win_probabilities
+
+    def win_probability(self, state=1, turns_left=None):
+        """Probability of winning from ``state`` within ``turns_left`` turns (default the horizon)"""
+        if turns_left is None or turns_left == self.horizon:
+            return float(self.win_probabilities[state])
+        if self.values is None:
+            raise ValueError("Only the full horizon is stored, create the agent with store_values=True")
+        return float(self.values[turns_left, state])
+
+    def choose_action(self, state, turns_left):
+        """Roll to take from ``state`` with ``turns_left`` turns to go
+
+        Beyond the horizon the roll for the whole horizon is used, and with
+        no turns left the roll for one.
+        """
+        turns_left = min(max(turns_left, 1), self.horizon)
+        return self.policy[turns_left - 1, state]
+
+    def get_values(self):
+        """Return the win-within-t probabilities, indexed by [t, state]"""
+        return self.values
+
+    def get_policy(self):
+        """Return the policy table, indexed by [turns left - 1, state]"""
+        return self.policy
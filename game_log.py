@@ -0,0 +1,195 @@
+import os
+import numpy as np
+from streaming_stats import RunningStats
+
+# File layout: a 16-byte file header, then one record per game. A record is
+# an 8-byte game header (number of moves, finished flag) followed by the
+# dice rolls as uint8 and the position after each move, stored in the
+# smallest unsigned type that holds the board size. Records are unaligned
+# and read through NumPy views of the memory-mapped file.
+MAGIC = b"SLGLOG01"
+FILE_HEADER = np.dtype([("magic", "S8"), ("board_size", "<u4"), ("position_size", "u1"),
+                        ("reserved", "V3")])
+GAME_HEADER = np.dtype([("moves", "<u4"), ("finished", "u1"), ("reserved", "V3")])
+
+# The index lives next to the log as "<log>.idx" with one entry per game.
+# It is written after the game's record, so a reader never sees a game
+# whose record is incomplete. A log without one is indexed by walking
+# the records when it is opened.
+INDEX_ENTRY = np.dtype([("offset", "<u8"), ("moves", "<u4")])
+
+POSITION_TYPES = {1: np.dtype(np.uint8), 2: np.dtype("<u2"), 4: np.dtype("<u4")}
+
+def position_type(board_size):
+    """Smallest unsigned integer type that can hold every position"""
+    for dtype in POSITION_TYPES.values():
+        if board_size <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"Board size {board_size} is too large for a game log")
+
+class GameLogWriter:
+    """Appends games to a log file, creating it if it does not exist
+
+    Use ``append`` for a single game and ``append_batch`` for the padded
+    arrays that ``iter_simulations(record_moves=True)`` yields. Appending
+    to an existing log requires the same board size.
+    """
+
+    def __init__(self, path, board_size):
+        self.path = path
+        self.board_size = board_size
+        self.position_dtype = position_type(board_size)
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.data = open(path, "ab")
+        self.index = open(path + ".idx", "ab")
+        if exists:
+            with open(path, "rb") as f:
+                header = np.frombuffer(f.read(FILE_HEADER.itemsize), FILE_HEADER)[0]
+            if header["magic"] != MAGIC or header["board_size"] != board_size:
+                self.close()
+                raise ValueError(f"{path} is not a game log for a board of size {board_size}")
+        else:
+            header = np.zeros(1, FILE_HEADER)
+            header["magic"] = MAGIC
+            header["board_size"] = board_size
+            header["position_size"] = self.position_dtype.itemsize
+            self.data.write(header.tobytes())
+        self.offset = self.data.tell()
+
+    def append(self, dice, positions):
+        """Append one game given its rolls and the position after each move"""
+        dice = np.asarray(dice, dtype=np.uint8)
+        positions = np.asarray(positions)
+        self.append_batch(np.array([dice.size]), dice[None], positions[None])
+
+    def append_batch(self, steps, rolls, positions):
+        """Append many games at once from ``(games, moves)`` arrays padded past each game's end"""
+        steps = np.asarray(steps, dtype=np.int64)
+        n = steps.size
+        if n == 0:
+            return
+        width = rolls.shape[1]
+        position_size = self.position_dtype.itemsize
+        sizes = GAME_HEADER.itemsize + steps * (1 + position_size)
+        starts = np.zeros(n, dtype=np.int64)
+        np.cumsum(sizes[:-1], out=starts[1:])
+
+        # Scatter every game's header, rolls and positions into one buffer
+        buffer = np.zeros(int(sizes.sum()), dtype=np.uint8)
+        last = positions[np.arange(n), np.maximum(steps - 1, 0)] if width else np.zeros(n)
+        headers = np.zeros(n, GAME_HEADER)
+        headers["moves"] = steps
+        headers["finished"] = (steps > 0) & (last == self.board_size)
+        buffer[(starts[:, None] + np.arange(GAME_HEADER.itemsize)).ravel()] = headers.view(np.uint8)
+
+        played = np.arange(width) < steps[:, None]
+        roll_starts = starts + GAME_HEADER.itemsize
+        buffer[(roll_starts[:, None] + np.arange(width))[played]] = rolls[played]
+
+        position_bytes = positions.astype(self.position_dtype).view(np.uint8).reshape(n, width, position_size)
+        position_starts = roll_starts + steps
+        targets = (position_starts[:, None, None] + np.arange(width)[:, None] * position_size
+                   + np.arange(position_size))
+        buffer[targets[played]] = position_bytes[played]
+
+        self.data.write(buffer.tobytes())
+        self.data.flush()
+        index = np.zeros(n, INDEX_ENTRY)
+        index["offset"] = self.offset + starts
+        index["moves"] = steps
+        self.index.write(index.tobytes())
+        self.index.flush()
+        self.offset += buffer.size
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class GameLog:
+    """Memory-mapped reader of a game log
+
+    Indexing and iterating give ``(dice, positions)`` arrays that are views
+    of the mapped file, so reading a game copies nothing. Games appended
+    after the log was opened are not visible until it is reopened. If the
+    index file is missing, the index is rebuilt in memory from the records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        header = self.data[:FILE_HEADER.itemsize].view(FILE_HEADER)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a game log")
+        self.board_size = int(header["board_size"])
+        self.position_dtype = POSITION_TYPES[int(header["position_size"])]
+        if not os.path.exists(path + ".idx"):
+            self.index = self._scan_index()
+        elif os.path.getsize(path + ".idx") >= INDEX_ENTRY.itemsize:
+            self.index = np.memmap(path + ".idx", dtype=INDEX_ENTRY, mode="r")
+        else:
+            self.index = np.zeros(0, INDEX_ENTRY)
+
+    def _scan_index(self):
+        """Index entries of every complete record, found by walking the game headers"""
+        entries = []
+        offset = FILE_HEADER.itemsize
+        record_bytes = 1 + self.position_dtype.itemsize
+        while offset + GAME_HEADER.itemsize <= self.data.size:
+            moves = int(self.data[offset:offset + GAME_HEADER.itemsize].view(GAME_HEADER)[0]["moves"])
+            end = offset + GAME_HEADER.itemsize + moves * record_bytes
+            if end > self.data.size:
+                break  # A record cut short by a writer that died mid-append
+            entries.append((offset, moves))
+            offset = end
+        return np.array(entries, dtype=INDEX_ENTRY)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        return self._game(int(self.index["offset"][i]), int(self.index["moves"][i]))
+
+    def __iter__(self):
+        for offset, moves in zip(self.index["offset"].tolist(), self.index["moves"].tolist()):
+            yield self._game(offset, moves)
+
+    def _game(self, offset, moves):
+        start = offset + GAME_HEADER.itemsize
+        dice = self.data[start:start + moves]
+        positions = self.data[start + moves:start + moves * (1 + self.position_dtype.itemsize)]
+        return np.asarray(dice), np.asarray(positions).view(self.position_dtype)
+
+    def finished(self, i):
+        """Whether game i reached the last cell, rather than being cut off"""
+        offset = int(self.index["offset"][i])
+        return bool(self.data[offset:offset + GAME_HEADER.itemsize].view(GAME_HEADER)[0]["finished"])
+
+    @property
+    def steps(self):
+        """Number of moves of every game, read from the index alone"""
+        return np.asarray(self.index["moves"])
+
+    def won(self, start=0, stop=None):
+        """Whether each game reached the last cell, read from the game headers"""
+        offsets = np.asarray(self.index["offset"][start:stop])
+        return self.data[offsets + GAME_HEADER.fields["finished"][1]] != 0
+
+    def steps_statistics(self, chunk_size=1_000_000):
+        """Steps-to-win summary and histogram, without replaying any game
+
+        Only games that reached the last cell count; games cut off at a
+        step limit did not win and would bias the steps low.
+        """
+        stats = RunningStats()
+        steps = self.steps
+        for start in range(0, steps.size, chunk_size):
+            stop = start + chunk_size
+            stats.update(steps[start:stop][self.won(start, stop)])
+        return stats
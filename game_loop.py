@@ -0,0 +1,204 @@
+import random
+import pygame
+
+class GameLoop:
+    """Frame-paced state machine that drives the GUI
+
+    Every iteration handles input, advances the current phase by the time
+    elapsed on a pygame Clock and redraws. Animations are time-based tweens,
+    so input is handled mid-animation, and while nothing is animating the
+    loop blocks on the event queue and only redraws when an event arrives.
+
+    Phases: "idle" (no game running), "await_roll" (roll mode, waiting for
+    a click), "dice" (dice rolling), "dice_hold" (showing the final dice),
+    "move" (token moving between cells) and "finish" (showing the final
+    position before returning to idle).
+    """
+
+    MOVE_DURATION = 1.0  # Seconds for the token to travel between two cells
+    DICE_FACE_DURATIONS = (0.05, 0.1, 0.15, 0.2, 0.25, 0.3)  # Slowing dice faces
+    DICE_HOLD_DURATION = 0.5  # Pause to show the final dice roll
+    FINISH_DURATION = 1.0  # Pause on the final position
+
+    ANIMATED_PHASES = ("dice", "dice_hold", "move", "finish")
+
+    ANALYTICS_POLL_MS = 100  # Longest idle wait while background analytics run
+
+    def __init__(self, env, agent, visualizer, fps=60, analytics=None, game_log=None):
+        self.env = env
+        self.agent = agent
+        self.visualizer = visualizer
+        self.fps = fps  # Frame cap while animating
+        self.analytics = analytics  # Optional AnalyticsPipeline, restarted on reset
+        self.game_log = game_log  # Optional GameLogWriter that gets every finished game
+        self.clock = pygame.time.Clock()
+
+        self.running = True
+        self.phase = "idle"
+        self.phase_time = 0.0  # Seconds since the current phase started
+        self.game_state = "idle"  # "idle", "auto" or "roll", as shown in the stats panel
+        self.position = 1
+        self.steps = 0
+        self.dice = 0
+        self.dice_faces = []
+        self.move_start = 1
+        self.move_end = 1
+        self.move_done = False
+        self.game_dice = []  # Rolls and positions of the game so far, for the log
+        self.game_positions = []
+        self.needs_redraw = True
+
+    def run(self, max_frames=None):
+        """Run until the window is closed, or until max_frames frames are drawn"""
+        frames = 0
+        while self.running:
+            if self.phase in self.ANIMATED_PHASES or self.needs_redraw:
+                dt = self.clock.tick(self.fps) / 1000.0
+                events = pygame.event.get()
+            else:
+                # Nothing is moving or pending: sleep until there is input,
+                # waking up regularly to pick up analytics progress
+                if self.analytics is not None and self.analytics.running:
+                    event = pygame.event.wait(self.ANALYTICS_POLL_MS)
+                else:
+                    event = pygame.event.wait()
+                events = [event] if event.type != pygame.NOEVENT else []
+                events += pygame.event.get()
+                self.clock.tick(self.fps)
+                dt = 0.0
+
+            if self.analytics is not None and self.analytics.poll():
+                self.needs_redraw = True
+
+            for event in events:
+                self.handle_event(event)
+            self.update(dt)
+
+            if self.running and (self.needs_redraw or self.phase in self.ANIMATED_PHASES):
+                self.draw()
+                self.needs_redraw = False
+                frames += 1
+                if max_frames is not None and frames >= max_frames:
+                    self.running = False
+
+        if self.analytics is not None:
+            self.analytics.cancel()
+        self.visualizer.close()
+
+    def set_phase(self, phase):
+        self.phase = phase
+        self.phase_time = 0.0
+        self.needs_redraw = True
+
+    def handle_event(self, event):
+        """React to one pygame event"""
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            button = self.visualizer.check_button_click(event.pos)
+            if button == "reset":
+                self.reset()
+            elif button == "start" and self.phase == "idle":
+                self.start_game("auto")
+            elif button == "roll" and self.phase == "idle":
+                self.start_game("roll")
+            elif button == "roll" and self.phase == "await_roll":
+                self.roll_dice()
+            self.needs_redraw = True
+        elif event.type == pygame.MOUSEBUTTONUP:
+            # Reset button pressed state if mouse button is released
+            self.visualizer.button_pressed = None
+            self.needs_redraw = True
+        else:
+            # Hover changes, window exposure and the like
+            self.needs_redraw = True
+
+    def reset(self):
+        """Abandon any game in progress and re-queue the analytics"""
+        self.env.reset()
+        if self.analytics is not None:
+            self.analytics.restart()
+        self.game_state = "idle"
+        self.position = 1
+        self.steps = 0
+        self.dice = 0
+        self.set_phase("idle")
+
+    def start_game(self, mode):
+        self.position = self.env.reset()
+        self.steps = 0
+        self.dice = 0
+        self.game_dice = []
+        self.game_positions = []
+        self.game_state = mode
+        if mode == "auto":
+            self.start_move(self.agent.choose_action(self.position))
+        else:
+            self.set_phase("await_roll")
+
+    def roll_dice(self):
+        """Show a few random faces, the last of which is the roll"""
+        self.dice_faces = [random.randint(1, 6) for _ in self.DICE_FACE_DURATIONS]
+        self.dice = self.dice_faces[0]
+        self.set_phase("dice")
+
+    def start_move(self, action):
+        """Take a step in the environment and start animating it"""
+        self.dice = int(action)
+        self.move_start = self.position
+        self.move_end, _, self.move_done, _ = self.env.step(action)
+        self.game_dice.append(self.dice)
+        self.game_positions.append(self.move_end)
+        self.set_phase("move")
+
+    def update(self, dt):
+        """Advance the current phase by dt seconds"""
+        if self.phase not in self.ANIMATED_PHASES:
+            return
+        self.phase_time += dt
+
+        if self.phase == "dice":
+            # Pick the face for the current point of the roll
+            elapsed = 0.0
+            for face, duration in zip(self.dice_faces, self.DICE_FACE_DURATIONS):
+                self.dice = face
+                elapsed += duration
+                if self.phase_time < elapsed:
+                    break
+            else:
+                self.set_phase("dice_hold")
+        elif self.phase == "dice_hold":
+            if self.phase_time >= self.DICE_HOLD_DURATION:
+                self.start_move(self.dice)
+        elif self.phase == "move":
+            if self.phase_time >= self.MOVE_DURATION:
+                self.position = self.move_end
+                self.steps += 1
+                if self.move_done:
+                    if self.game_log is not None:
+                        self.game_log.append(self.game_dice, self.game_positions)
+                    self.set_phase("finish")
+                elif self.game_state == "auto":
+                    self.start_move(self.agent.choose_action(self.position))
+                else:
+                    self.set_phase("await_roll")
+        elif self.phase == "finish":
+            if self.phase_time >= self.FINISH_DURATION:
+                self.position = 1
+                self.dice = 0
+                self.set_phase("idle")
+
+    def draw(self):
+        """Draw the current frame"""
+        moving_token = None
+        if self.phase == "move":
+            # Interpolate the token between the two cell centers
+            t = min(self.phase_time / self.MOVE_DURATION, 1.0)
+            start_x, start_y = self.visualizer.get_cell_center(self.move_start)
+            end_x, end_y = self.visualizer.get_cell_center(self.move_end)
+            moving_token = (start_x + (end_x - start_x) * t, start_y + (end_y - start_y) * t)
+
+        analytics = self.analytics.status_lines() if self.analytics is not None else None
+        self.visualizer.draw_board(self.position, self.env.snakes, self.env.ladders, self.steps,
+                                   self.dice, self.game_state, moving_token=moving_token,
+                                   analytics=analytics)
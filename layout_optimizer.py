@@ -0,0 +1,271 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from analysis import transition_matrix
+from environment import SnakeAndLadderEnv, random_layout
+
+def layout_moments(env, start=1):
+    """Exact mean and variance of the number of turns to win with a fair die
+
+    With ``N = (I - Q)^-1`` the fundamental matrix of the chain over the
+    cells before the last, the expected turns are ``t = N 1`` and the
+    second moments ``N (2t - 1)``.
+    """
+    n = env.board_size
+    q = transition_matrix(env)[:n, :n]
+    fundamental = np.linalg.inv(np.eye(n) - q)
+    turns = fundamental.sum(axis=1)
+    second_moment = fundamental[start] @ (2 * turns - 1)
+    return float(turns[start]), float(second_moment - turns[start] ** 2)
+
+class LayoutEvaluator:
+    """Exact game length moments of a layout, updated as snakes and ladders move
+
+    Keeps the fundamental matrix ``N`` of the current layout. Changing the
+    jump of one cell moves the probability of landing on it, in the rows
+    of the few cells that can reach it, from the old target's column to
+    the new one's: a rank-one change of ``Q``. A move changing ``k`` jumps
+    is therefore evaluated with the Woodbury identity in ``O(k * cells)``
+    instead of the ``O(cells^3)`` of a full solve, and applied in
+    ``O(k * cells^2)``. ``N`` is recomputed every ``refresh`` applied moves
+    to keep rounding errors from building up.
+    """
+
+    def __init__(self, env, start=1, refresh=1000):
+        self.env = env
+        self.start = start
+        self.refresh = refresh
+        n = env.board_size
+        # Rows whose rolls land on each cell, before following jumps, and
+        # the chance of doing so: cell c is reached from rows lo[c]:lo[c] + 12
+        landing = np.arange(n)[:, None] + np.arange(1, 7)[None, :]
+        landing = np.where(landing > n, 2 * n - landing, landing)
+        self.lo = np.clip(np.arange(n + 1) - 6, 0, max(n - 12, 0))
+        self.landing_probs = np.array([np.count_nonzero(landing[lo:lo + 12] == cell, axis=1) / 6.0
+                                       for cell, lo in enumerate(self.lo)])
+        self.applied = 0
+        self._last = (None, None)
+        self.recompute()
+
+    def recompute(self):
+        """Rebuild N and the expected turns from the environment's current layout"""
+        n = self.env.board_size
+        q = transition_matrix(self.env)[:n, :n]
+        # The last cell is absorbing and has no column in Q; a zero row for
+        # it lets moves to and from it be handled like any other cell
+        self.fundamental = np.zeros((n + 1, n))
+        self.fundamental[:n] = np.linalg.inv(np.eye(n) - q)
+        self.turns = self.fundamental.sum(axis=1)
+        second_moment = self.fundamental[self.start] @ (2 * self.turns[:n] - 1)
+        self.mean = float(self.turns[self.start])
+        self.variance = float(second_moment - self.mean ** 2)
+
+    def _update(self, changes):
+        """Woodbury terms of a list of ``(cell, old target, new target)`` jump changes
+
+        Returns ``(NU, VtN, C^-1)`` with ``N' = N + NU C^-1 VtN``, or None if
+        the new layout has cells from which the last cell cannot be reached.
+        """
+        cells, olds, news = np.array(changes).T
+        # Columns of N U: N times each cell's landing probabilities
+        nu = np.zeros((len(self.fundamental), len(changes)))
+        for j, (cell, lo) in enumerate(zip(cells.tolist(), self.lo[cells].tolist())):
+            nu[:, j] = self.fundamental[:, lo:lo + 12] @ self.landing_probs[cell]
+        vtn = self.fundamental[news] - self.fundamental[olds]
+        capacitance = np.eye(len(changes)) - (nu[news] - nu[olds])
+        inverse = _small_inverse(capacitance)
+        if inverse is None:
+            return None
+        return nu, vtn, inverse
+
+    def evaluate(self, changes):
+        """Mean and variance after the jump changes, without applying them
+
+        Returns None if the last cell could not be reached from every cell.
+        """
+        update = self._update(changes)
+        if update is None:
+            return None
+        self._last = (changes, update)  # Reused if these changes are applied next
+        nu, vtn, inverse = update
+        n = self.env.board_size
+        turns = self.turns[:n] + nu[:n] @ (inverse @ vtn.sum(axis=1))
+        weights = 2 * turns - 1
+        second_moment = (self.fundamental[self.start] @ weights
+                         + nu[self.start] @ (inverse @ (vtn @ weights)))
+        mean = float(turns[self.start])
+        variance = float(second_moment - mean ** 2)
+        if not (math.isfinite(mean) and mean > 0 and variance >= 0):
+            return None
+        return mean, variance
+
+    def apply(self, changes, moments):
+        """Commit jump changes whose ``evaluate`` result was ``moments``"""
+        last_changes, update = self._last
+        nu, vtn, inverse = update if last_changes is changes else self._update(changes)
+        self.fundamental += nu @ (inverse @ vtn)
+        self.turns = self.fundamental.sum(axis=1)
+        self.mean, self.variance = moments
+        self.applied += 1
+        if self.applied % self.refresh == 0:
+            self.recompute()
+
+def _small_inverse(matrix, tolerance=1e-9):
+    """Inverse of a 1x1 or 2x2 matrix in closed form, np.linalg for larger ones
+
+    Returns None for (nearly) singular matrices.
+    """
+    if len(matrix) == 1:
+        return None if abs(matrix[0, 0]) < tolerance else 1.0 / matrix
+    if len(matrix) == 2:
+        (a, b), (c, d) = matrix.tolist()
+        det = a * d - b * c
+        return None if abs(det) < tolerance else np.array([[d, -b], [-c, a]]) / det
+    if abs(np.linalg.det(matrix)) < tolerance:
+        return None
+    return np.linalg.inv(matrix)
+
+def _propose(snakes, ladders, board_size, rng, radius=10):
+    """Random move of one snake or ladder endpoint that keeps the layout valid
+
+    Returns the new ``(snakes, ladders)`` and the jump changes as ``(cell,
+    old target, new target)``, or None if the drawn move is not allowed.
+    Half the moves go anywhere on the board, half within ``radius`` cells.
+    """
+    is_snake = rng.random() < len(snakes) / (len(snakes) + len(ladders))
+    jumps = snakes if is_snake else ladders
+    start = list(jumps)[rng.integers(len(jumps))]
+    end = jumps[start]
+    starts = set(snakes) | set(ladders)
+    ends = set(snakes.values()) | set(ladders.values())
+    move_start = rng.random() < 0.5
+    old = start if move_start else end
+    if rng.random() < 0.5:
+        new = old + int(rng.integers(-radius, radius + 1))
+    else:
+        new = int(rng.integers(1, board_size + 1))
+
+    if move_start:
+        # Starts are distinct and not on the first or last cell or on an end
+        if not 1 < new < board_size or new in starts or new in ends or new == start:
+            return None
+        if (new <= end) if is_snake else (new >= end):
+            return None
+        changes = [(start, end, start), (new, new, end)]
+        updated = {cell: target for cell, target in jumps.items() if cell != start}
+        updated[new] = end
+    else:
+        if new == end or new in starts or not 1 <= new <= board_size:
+            return None
+        if (new >= start) if is_snake else (new <= start):
+            return None
+        changes = [(start, end, new)]
+        updated = dict(jumps)
+        updated[start] = new
+    if is_snake:
+        return updated, ladders, changes
+    return snakes, updated, changes
+
+def objective(mean, variance, target_mean, target_variance=None):
+    """Squared relative error from the targets"""
+    value = ((mean - target_mean) / target_mean) ** 2
+    if target_variance is not None:
+        value += ((variance - target_variance) / target_variance) ** 2
+    return value
+
+def anneal_layout(board_size, snakes, ladders, target_mean, target_variance=None, iterations=20_000,
+                  initial_temperature=0.1, final_temperature=1e-6, seed=None):
+    """Simulated annealing over snake and ladder endpoints from one starting layout
+
+    The number of snakes and ladders stays the same. Returns a dict with the
+    best "snakes" and "ladders" found, their "mean", "variance" and
+    "objective", and the number of candidate "evaluations" and "seconds"
+    spent.
+    """
+    start_time = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    env = SnakeAndLadderEnv(board_size, snakes, ladders)
+    evaluator = LayoutEvaluator(env)
+    current = objective(evaluator.mean, evaluator.variance, target_mean, target_variance)
+    best = (current, dict(snakes), dict(ladders), evaluator.mean, evaluator.variance)
+    cooling = (final_temperature / initial_temperature) ** (1 / max(iterations - 1, 1))
+    temperature = initial_temperature
+    evaluations = 0
+
+    for _ in range(iterations):
+        temperature *= cooling
+        proposal = _propose(env.snakes, env.ladders, board_size, rng)
+        if proposal is None:
+            continue
+        new_snakes, new_ladders, changes = proposal
+        moments = evaluator.evaluate(changes)
+        evaluations += 1
+        if moments is None:
+            continue
+        candidate = objective(*moments, target_mean, target_variance)
+        if candidate <= current or rng.random() < math.exp((current - candidate) / temperature):
+            env.update_layout(new_snakes, new_ladders)
+            evaluator.apply(changes, moments)
+            current = candidate
+            if current < best[0]:
+                best = (current, dict(env.snakes), dict(env.ladders), *moments)
+
+    # Report the exact moments of the best layout, free of accumulated rounding
+    mean, variance = layout_moments(SnakeAndLadderEnv(board_size, best[1], best[2]))
+    return {
+        "snakes": best[1],
+        "ladders": best[2],
+        "mean": mean,
+        "variance": variance,
+        "objective": objective(mean, variance, target_mean, target_variance),
+        "evaluations": evaluations,
+        "seconds": time.perf_counter() - start_time,
+    }
+
+def _anneal_restart(args):
+    """Worker: one annealing run from a random layout, or the given one if it is set"""
+    board_size, num_snakes, num_ladders, layout, seed, kwargs = args
+    if layout is None:
+        layout = random_layout(board_size, num_snakes, num_ladders, seed=seed)
+    return anneal_layout(board_size, *layout, seed=seed, **kwargs)
+
+def optimize_layout(target_mean, target_variance=None, board_size=100, snakes=None, ladders=None,
+                    restarts=None, workers=None, iterations=20_000, seed=None):
+    """Search layouts for a target game length, with annealing restarts in parallel
+
+    The first restart starts from the given layout (by default the standard
+    board's, or on other board sizes a random one with as many snakes and
+    ladders per cell), the others from random layouts with as many snakes
+    and ladders.
+    Returns the best restart's result with the total "evaluations" and
+    "evaluations_per_second" across all restarts and the "restarts" run.
+    """
+    if snakes is None or ladders is None:
+        default = SnakeAndLadderEnv()
+        if board_size != default.board_size:
+            # The standard layout only fits its own board
+            scale = board_size / default.board_size
+            layout = random_layout(board_size, max(1, round(len(default.snakes) * scale)),
+                                   max(1, round(len(default.ladders) * scale)), seed=seed)
+            default.snakes, default.ladders = layout
+        snakes = default.snakes if snakes is None else snakes
+        ladders = default.ladders if ladders is None else ladders
+    workers = workers or os.cpu_count() or 1
+    restarts = restarts or workers
+    seeds = np.random.SeedSequence(seed).generate_state(restarts)
+    kwargs = {"target_mean": target_mean, "target_variance": target_variance, "iterations": iterations}
+    tasks = [(board_size, len(snakes), len(ladders), (snakes, ladders) if i == 0 else None,
+              int(seeds[i]), kwargs) for i in range(restarts)]
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_anneal_restart, tasks))
+    elapsed = time.perf_counter() - start_time
+
+    best = dict(min(results, key=lambda result: result["objective"]))
+    best["evaluations"] = sum(result["evaluations"] for result in results)
+    best["evaluations_per_second"] = best["evaluations"] / elapsed
+    best["restarts"] = restarts
+    return best
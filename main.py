@@ -1,255 +1,350 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import pygame
-from environment import SnakeAndLadderEnv
-from value_iteration_agent import ValueIterationAgent
-from visualization import SnakeAndLadderVisualizer
-import time
-import random
-
-def simulate_games(env, agent, num_games=100):
-    """Simulate multiple games to find min/max steps with path tracking"""
-    steps_list = []
-    paths = []  # Store the paths taken
-    
-    for _ in range(num_games):
-        state = env.reset()
-        steps = 0
-        done = False
-        path = [state]  # Track the path taken
-        
-        while not done:
-            # Add some randomness to the policy
-            if random.random() < 0.1:  # 10% chance of random action
-                action = random.randint(1, 6)
-            else:
-                action = agent.choose_action(state)
-            
-            next_state, _, done, _ = env.step(action)
-            path.append(next_state)
-            state = next_state
-            steps += 1
-        
-        steps_list.append(steps)
-        paths.append(path)
+import argparse
+
+# Subcommands import what they need when they run, so that e.g. "play" never
+# loads matplotlib and "--help" loads nothing at all.
+
+def simulate_games(env, agent, num_games=100, seed=None, log=None):
+    """Simulate games and summarize steps to win and unique paths in constant memory
+
+    Every game is also appended to ``log``, a GameLogWriter, if one is given.
+    """
+    from simulation import iter_simulations
+    from streaming_stats import DistinctCounter, RunningStats
+    
+    stats = RunningStats()
+    unique_paths = DistinctCounter()  # Estimates the unique paths taken from their hashes
     
-    # Find unique paths
-    unique_paths = []
-    for path in paths:
-        if path not in unique_paths:
-            unique_paths.append(path)
+    # Play the games in vectorized batches with a 10% chance of random action
+    for steps, hashes, *moves in iter_simulations(env, agent.policy, num_games,
+                                                  exploration_rate=0.1, seed=seed,
+                                                  chunk_size=100_000, hash_paths=True,
+                                                  record_moves=log is not None):
+        stats.update(steps)
+        unique_paths.update(hashes)
+        if log is not None:
+            log.append_batch(steps, *moves)
     
     # Print path statistics
     print("\nPath Statistics:")
-    print(f"Total unique paths found: {len(unique_paths)}")
-    if len(unique_paths) > 0:
+    print(f"Unique paths found: about {unique_paths.estimate():.0f}")
+    if num_games > 0:
         print("\nExample paths:")
-        for i, path in enumerate(unique_paths[:3]):  # Show first 3 unique paths
+        # First few unique paths of a small separate batch
+        _, paths = next(iter_simulations(env, agent.policy, min(num_games, 100),
+                                         exploration_rate=0.1, seed=seed, record_paths=True))
+        examples = list(dict.fromkeys(map(tuple, paths)))[:3]
+        for i, path in enumerate(examples):
             print(f"Path {i+1}: {' -> '.join(map(str, path))}")
             print(f"Steps: {len(path)-1}\n")
     
-    return steps_list
-
-def visualize_values(agent, env):
-    """Visualize the learned value function"""
-    values = agent.get_values()
-    policy = agent.get_policy()
-    
-    # Create a heatmap of the value function
-    plt.figure(figsize=(12, 8))
-    
-    # Plot value function
-    plt.subplot(2, 1, 1)
-    plt.plot(range(1, env.board_size + 1), values[1:])
-    plt.title('Value Function')
-    plt.xlabel('Position')
-    plt.ylabel('Value')
-    
-    # Plot policy
-    plt.subplot(2, 1, 2)
-    plt.bar(range(1, env.board_size + 1), policy[1:])
-    plt.title('Optimal Policy')
-    plt.xlabel('Position')
-    plt.ylabel('Dice Roll')
-    
-    plt.tight_layout()
-    plt.savefig('value_iteration_results.png')
-    plt.close()
-
-def animate_movement(visualizer, start_pos, end_pos, snakes, ladders, steps, dice, game_state):
-    """Animate smooth movement between positions"""
-    start_x, start_y = visualizer.get_cell_center(start_pos)
-    end_x, end_y = visualizer.get_cell_center(end_pos)
-    
-    frames = 20
-    for i in range(frames + 1):
-        t = i / frames
-        current_x = start_x + (end_x - start_x) * t
-        current_y = start_y + (end_y - start_y) * t
-        
-        # Draw board with current position
-        visualizer.draw_board(
-            start_pos if i < frames else end_pos,
-            snakes,
-            ladders,
-            steps,
-            dice,
-            game_state
-        )
-        
-        # Draw moving player
-        pygame.draw.circle(visualizer.screen, (100, 100, 100),
-                         (int(current_x) + 2, int(current_y) + 2),
-                         visualizer.cell_size/4)
-        pygame.draw.circle(visualizer.screen, visualizer.PLAYER_COLOR,
-                         (int(current_x), int(current_y)),
-                         visualizer.cell_size/4)
-        
-        pygame.display.flip()
-        time.sleep(0.05)
-
-def animate_dice_roll(visualizer, state, snakes, ladders, steps, game_state):
-    """Animate the dice rolling"""
-    # Show multiple random dice faces with increasing delay
-    delays = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3]
-    for delay in delays:
-        current_dice = random.randint(1, 6)
-        visualizer.draw_board(state, snakes, ladders, steps, current_dice, game_state)
-        time.sleep(delay)
-    return current_dice
-
-def play_game(env, agent, visualizer, roll_mode=False):
-    """Play a single game with visualization"""
-    state = env.reset()
-    done = False
-    steps = 0
-    game_state = "roll" if roll_mode else "auto"
-    current_dice = 0
-    
-    while not done:
-        # Draw current state
-        visualizer.draw_board(state, env.snakes, env.ladders, steps, current_dice, game_state)
-        
-        # Get action
-        if roll_mode:
-            # Wait for roll button click
-            action = None
-            while action is None:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        return "quit", steps
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        button = visualizer.check_button_click(event.pos)
-                        if button == "roll":
-                            # Animate dice roll
-                            current_dice = animate_dice_roll(visualizer, state, env.snakes, env.ladders, steps, game_state)
-                            action = current_dice
-                            time.sleep(0.5)  # Pause to show final dice roll
-                        elif button == "reset":
-                            return "reset", steps
-        else:
-            # Get action from agent
-            action = agent.choose_action(state)
-            current_dice = action
-        
-        # Take step
-        next_state, reward, done, info = env.step(action)
-        
-        # Animate movement
-        animate_movement(visualizer, state, next_state, env.snakes, env.ladders, steps, current_dice, game_state)
-        
-        # Update state
-        state = next_state
-        steps += 1
-        
-        # Check for quit event
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return "quit", steps
+    return stats
+
+def print_statistics(env, agent, stats):
+    """Print min/max/mean statistics from a RunningStats summary and the exact expectation"""
+    from analysis import expected_turns
+    
+    print("\nGame Statistics:")
+    print(f"Minimum steps to win: {stats.min}")
+    print(f"Maximum steps to win: {stats.max}")
+    print(f"Average steps to win: {stats.mean:.2f}")
+    print(f"Standard deviation: {stats.std:.2f}")
+    print(f"Median / 90th / 99th percentile: {stats.quantile(0.5)} / "
+          f"{stats.quantile(0.9)} / {stats.quantile(0.99)}")
     
-    # Show final position for a moment
-    time.sleep(1.0)
-    return "done", steps
+    # Exact expectation for the same 10% exploration policy
+    exact_steps = expected_turns(env, agent.policy, exploration_rate=0.1)[1]
+    print(f"Exact expected steps to win: {exact_steps:.2f}")
 
-def main():
-    # Initialize environment and agent
+def load_agent(method="jacobi", use_cache=True):
+    """Build the environment and a solved agent, reusing a cached solution if any"""
+    from environment import SnakeAndLadderEnv
+    from value_iteration_agent import ValueIterationAgent
+    from policy_cache import PolicyCache
+    
     env = SnakeAndLadderEnv()
-    agent = ValueIterationAgent(env)
-    visualizer = SnakeAndLadderVisualizer()
+    cache = PolicyCache(".policy_cache") if use_cache else None
+    agent = ValueIterationAgent(env, method=method, cache=cache)
+    return env, agent
+
+def play(args):
+    """Open the game window straight away, with statistics computed in the background"""
+    from visualization import SnakeAndLadderVisualizer
+    from game_loop import GameLoop
     
-    # Simulate games to find min/max steps
+    env, agent = load_agent()
+    analytics = None
+    if args.analytics:
+        from analytics import AnalyticsPipeline
+        analytics = AnalyticsPipeline(env, agent, num_games=args.games, seed=args.seed)
+        analytics.start()
+    game_log = None
+    if args.log is not None:
+        from game_log import GameLogWriter
+        game_log = GameLogWriter(args.log, env.board_size)
+    visualizer = SnakeAndLadderVisualizer()
+    GameLoop(env, agent, visualizer, fps=args.fps, analytics=analytics,
+             game_log=game_log).run(max_frames=args.max_frames)
+    if game_log is not None:
+        game_log.close()
+
+def simulate(args):
+    """Simulate games and print statistics"""
+    env, agent = load_agent()
+    if args.ci_width is not None:
+        from evaluation import evaluate_policies
+        
+        print(f"Simulating games until the 95% confidence interval is {args.ci_width} steps wide...")
+        specs = {"agent": (agent.policy, 0.1)}
+        results, games = evaluate_policies(env, specs, ci_width=args.ci_width, seed=args.seed)
+        result = results["agent"]
+        print(f"Average steps to win: {result['mean']:.3f} +/- {result['half_width']:.3f} "
+              f"after {games} games")
+        return
     print("Simulating games to find optimal path statistics...")
-    steps_list = simulate_games(env, agent, num_games=1000)
+    if args.log is None:
+        stats = simulate_games(env, agent, num_games=args.games, seed=args.seed)
+    else:
+        from game_log import GameLogWriter
+        with GameLogWriter(args.log, env.board_size) as log:
+            stats = simulate_games(env, agent, num_games=args.games, seed=args.seed, log=log)
+    print_statistics(env, agent, stats)
+
+def solve(args):
+    """Solve the board and store the result in the policy cache"""
+    env, agent = load_agent(method=args.method, use_cache=not args.no_cache)
+    if agent.solve_info is None:
+        print("Loaded the solved policy from the cache")
+    else:
+        info = agent.solve_info
+        print(f"Solved with {info['method']} in {info['iterations']} iterations "
+              f"({info['backups']} backups), residual {info['residual']:.2e}, "
+              f"{info['wall_time'] * 1000:.2f} ms")
+
+def compare(args):
+    """Compare policies on common random numbers until the differences are precise enough"""
+    from agent import QLearningAgent
+    from evaluation import evaluate_policies, policy_specs
     
-    # Calculate statistics
-    min_steps = min(steps_list)
-    max_steps = max(steps_list)
-    avg_steps = np.mean(steps_list)
-    std_steps = np.std(steps_list)
+    env, agent = load_agent()
+    print(f"Training the Q-learning agent for {args.q_episodes} episodes...")
+    q_agent = QLearningAgent(env)
+    q_agent.train_vectorized(args.q_episodes, seed=args.seed)
     
-    print("\nGame Statistics:")
-    print(f"Minimum steps to win: {min_steps}")
-    print(f"Maximum steps to win: {max_steps}")
-    print(f"Average steps to win: {avg_steps:.2f}")
-    print(f"Standard deviation: {std_steps:.2f}")
+    specs = policy_specs(env, agent, q_agent)
+    results, games = evaluate_policies(env, specs, ci_width=args.ci_width, compare=True,
+                                       common_random_numbers=not args.no_crn, seed=args.seed)
+    print(f"\n{games} games per policy, 95% confidence intervals:")
+    for name, result in results.items():
+        line = f"{name:>30}: {result['mean']:7.3f} +/- {result['half_width']:.3f} steps"
+        if "difference" in result:
+            line += f", {result['difference']:+7.3f} +/- {result['difference_half_width']:.3f} vs first"
+        print(line)
+
+def multiplayer(args):
+    """Seat win probabilities of several value iteration players, exact and simulated"""
+    import time
+    import numpy as np
+    from multiplayer import seat_win_probabilities, simulate_multiplayer
+    
+    env, agent = load_agent()
+    policies = [agent.get_policy()] * args.players
+    start = time.perf_counter()
+    exact, length_pmf = seat_win_probabilities(env, policies)
+    exact_time = time.perf_counter() - start
+    start = time.perf_counter()
+    winners, moves = simulate_multiplayer(env, policies, args.games, seed=args.seed)
+    simulated_time = time.perf_counter() - start
+    simulated = np.bincount(winners[winners >= 0], minlength=args.players) / len(winners)
+    
+    print(f"{args.players} players, exact ({exact_time:.3f} s) vs {len(winners)} simulated games "
+          f"({simulated_time:.2f} s):")
+    for seat in range(args.players):
+        print(f"Seat {seat + 1}: {exact[seat]:.4f} exact, {simulated[seat]:.4f} simulated")
+    expected_moves = float(np.dot(np.arange(len(length_pmf)), length_pmf))
+    print(f"Game length: {expected_moves:.2f} moves exact, {moves.mean():.2f} simulated")
+
+def horizon(args):
+    """Best chance of winning within each number of turns, against the value iteration policy"""
+    from analysis import win_time_distribution
+    from finite_horizon_agent import FiniteHorizonAgent
+    
+    env, agent = load_agent()
+    finite = FiniteHorizonAgent(env, args.turns, exploration_rate=args.exploration_rate)
+    cdf = win_time_distribution(env, agent.get_policy(), args.exploration_rate, max_turns=args.turns)[1]
+    print(f"Solved {args.turns} turns in {finite.solve_time * 1000:.1f} ms, "
+          f"epsilon={args.exploration_rate:g}")
+    print(f"{'turns':>6} {'best P(win)':>12} {'value iteration':>16}")
+    for turns in range(1, args.turns + 1):
+        best = finite.win_probability(1, turns)
+        value_iteration = cdf[min(turns, len(cdf) - 1)]
+        if best > 0:
+            print(f"{turns:>6} {best:>12.6f} {value_iteration:>16.6f}")
+
+def design(args):
+    """Search snake and ladder placements for a target game length"""
+    from layout_optimizer import optimize_layout
+    
+    result = optimize_layout(args.target_mean, args.target_variance, board_size=args.board_size,
+                             restarts=args.restarts, workers=args.workers, iterations=args.iterations,
+                             seed=args.seed)
+    print(f"Best of {result['restarts']} restarts, {result['evaluations']} layouts evaluated "
+          f"({result['evaluations_per_second']:,.0f} evaluations/s)")
+    print(f"Turns to win with a fair die: mean {result['mean']:.3f}, variance {result['variance']:.2f}")
+    print(f"snakes = {dict(sorted(result['snakes'].items()))}")
+    print(f"ladders = {dict(sorted(result['ladders'].items()))}")
+
+def serve(args):
+    """Host games for many clients over local TCP"""
+    import asyncio
+    from server import GameServer
+    
+    env, agent = load_agent()
+    server = GameServer(env, agent, max_sessions=args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port,
+                                 ready=lambda port: print(f"Serving on {args.host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+def loadtest(args):
+    """Drive a running game server and report move latency and throughput"""
+    import asyncio
+    from server import run_load
+    
+    result = asyncio.run(run_load(args.host, args.port, clients=args.clients, sessions=args.sessions,
+                                  moves=args.moves, idle_sessions=args.idle_sessions))
+    print(f"{result['moves']} moves from {args.clients} clients: {result['moves_per_second']:,.0f} moves/s, "
+          f"latency p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms")
+    if result["idle_sessions"]:
+        before, after = result["max_rss_kb"]
+        print(f"{result['idle_sessions']} idle sessions: server peak memory {before / 1024:.1f} MB -> "
+              f"{after / 1024:.1f} MB, about {(after - before) * 1024 / result['idle_sessions']:.0f} B each")
+
+def plot(args):
+    """Simulate games and write the steps distribution and value function plots"""
+    from plotting import plot_steps_distribution, visualize_values
+    
+    env, agent = load_agent()
+    print("Simulating games to find optimal path statistics...")
+    stats = simulate_games(env, agent, num_games=args.games, seed=args.seed)
+    print_statistics(env, agent, stats)
     
     # Plot steps distribution
-    plt.figure(figsize=(10, 6))
-    plt.hist(steps_list, bins=20, edgecolor='black')
-    plt.title('Distribution of Steps to Win')
-    plt.xlabel('Number of Steps')
-    plt.ylabel('Frequency')
-    plt.savefig('steps_distribution.png')
-    plt.close()
+    plot_steps_distribution(stats)
     
     # Visualize the learned value function and policy
     print("\nVisualizing value function and policy...")
     visualize_values(agent, env)
+
+def positive_float(text):
+    """argparse type for targets that are divided by, e.g. --target-mean"""
+    value = float(text)
+    if not 0 < value < float("inf"):
+        raise argparse.ArgumentTypeError(f"must be positive and finite, got {text}")
+    return value
+
+def board_size(text):
+    """argparse type for a board with room for a few snakes and ladders"""
+    value = int(text)
+    if value < 10:
+        raise argparse.ArgumentTypeError(f"must be at least 10 cells, got {text}")
+    return value
+
+COMMANDS = {
+    "play": play,
+    "simulate": simulate,
+    "solve": solve,
+    "compare": compare,
+    "multiplayer": multiplayer,
+    "horizon": horizon,
+    "design": design,
+    "serve": serve,
+    "loadtest": loadtest,
+    "plot": plot,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snake and Ladder game with a Value Iteration agent")
+    parser.set_defaults(command="play", fps=60, max_frames=None, analytics=False, games=1000, seed=None,
+                        log=None)
+    subparsers = parser.add_subparsers(dest="command")
     
-    # Main game loop
-    running = True
-    game_state = "idle"
-    current_steps = 0
+    play_parser = subparsers.add_parser("play", help="open the game window (default)")
+    play_parser.add_argument("--fps", type=int, default=60, help="frame cap while animating")
+    play_parser.add_argument("--max-frames", type=int, default=None,
+                             help="quit after drawing this many frames, e.g. to measure startup")
+    play_parser.add_argument("--analytics", action="store_true",
+                             help="simulate games and write the plots in a background process")
     
-    while running:
-        # Draw initial state
-        visualizer.draw_board(1, env.snakes, env.ladders, current_steps, 0, game_state)
-        
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                button = visualizer.check_button_click(event.pos)
-                if button == "start":
-                    game_state = "auto"
-                    result, steps = play_game(env, agent, visualizer)
-                    current_steps = steps
-                    if result == "reset":
-                        env.reset()
-                        game_state = "idle"
-                    elif result == "quit":
-                        running = False
-                elif button == "reset":
-                    env.reset()
-                    game_state = "idle"
-                    current_steps = 0
-                elif button == "roll":
-                    game_state = "roll"
-                    result, steps = play_game(env, agent, visualizer, roll_mode=True)
-                    current_steps = steps
-                    if result == "reset":
-                        env.reset()
-                        game_state = "idle"
-                    elif result == "quit":
-                        running = False
-        
-        # Reset button pressed state if mouse button is released
-        if event.type == pygame.MOUSEBUTTONUP:
-            visualizer.button_pressed = None
+    for name, help_text in [("simulate", "simulate games and print statistics"),
+                            ("plot", "simulate games and write plots")]:
+        subparsers.add_parser(name, help=help_text)
+    
+    # Options of every subcommand that simulates games
+    for name in ("play", "simulate", "plot"):
+        command_parser = subparsers.choices[name]
+        command_parser.add_argument("--games", type=int, default=1000, help="number of games to simulate")
+        command_parser.add_argument("--seed", type=int, default=None, help="random seed")
+    
+    # Options of every subcommand that plays games worth keeping
+    for name in ("play", "simulate"):
+        subparsers.choices[name].add_argument("--log", default=None,
+                                              help="append every game to this game log file")
+    
+    subparsers.choices["simulate"].add_argument(
+        "--ci-width", type=float, default=None,
+        help="simulate until the 95%% confidence interval of the mean is this many steps wide")
+    
+    compare_parser = subparsers.add_parser("compare", help="compare policies on common random numbers")
+    compare_parser.add_argument("--ci-width", type=float, default=0.05,
+                                help="stop when every difference's 95%% interval is this narrow")
+    compare_parser.add_argument("--no-crn", action="store_true",
+                                help="use independent dice streams for every policy")
+    compare_parser.add_argument("--q-episodes", type=int, default=20000,
+                                help="Q-learning training episodes")
+    compare_parser.add_argument("--seed", type=int, default=None, help="random seed")
+    
+    multiplayer_parser = subparsers.add_parser("multiplayer", help="win probability of each seat")
+    multiplayer_parser.add_argument("--players", type=int, default=4, help="number of players")
+    multiplayer_parser.add_argument("--games", type=int, default=1_000_000, help="number of games to simulate")
+    multiplayer_parser.add_argument("--seed", type=int, default=None, help="random seed")
+    
+    horizon_parser = subparsers.add_parser("horizon", help="maximize the chance of winning within a turn budget")
+    horizon_parser.add_argument("--turns", type=int, default=20, help="turn budget")
+    horizon_parser.add_argument("--exploration-rate", type=float, default=0.1,
+                                help="chance that a move uses a random roll instead of the chosen one")
+    
+    design_parser = subparsers.add_parser("design", help="search layouts for a target game length")
+    design_parser.add_argument("--target-mean", type=positive_float, default=30.0, help="expected turns to win")
+    design_parser.add_argument("--target-variance", type=positive_float, default=None,
+                               help="variance of the turns to win")
+    design_parser.add_argument("--board-size", type=board_size, default=100, help="number of cells")
+    design_parser.add_argument("--restarts", type=int, default=None,
+                               help="annealing runs, one per CPU by default")
+    design_parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    design_parser.add_argument("--iterations", type=int, default=20000, help="moves per annealing run")
+    design_parser.add_argument("--seed", type=int, default=None, help="random seed")
+    
+    serve_parser = subparsers.add_parser("serve", help="host games for many clients over local TCP")
+    serve_parser.add_argument("--max-sessions", type=int, default=1_000_000,
+                              help="refuse new sessions beyond this many")
+    loadtest_parser = subparsers.add_parser("loadtest", help="measure a running server's latency")
+    loadtest_parser.add_argument("--clients", type=int, default=100, help="concurrent connections")
+    loadtest_parser.add_argument("--sessions", type=int, default=10, help="games played per connection")
+    loadtest_parser.add_argument("--moves", type=int, default=1000, help="moves per connection")
+    loadtest_parser.add_argument("--idle-sessions", type=int, default=0,
+                                 help="open this many sessions first and leave them idle")
+    for name in ("serve", "loadtest"):
+        subparsers.choices[name].add_argument("--host", default="127.0.0.1", help="server address")
+        subparsers.choices[name].add_argument("--port", type=int, default=8765, help="server port")
+    
+    solve_parser = subparsers.add_parser("solve", help="solve the board and cache the policy")
+    solve_parser.add_argument("--method", choices=("jacobi", "gauss-seidel", "policy-iteration", "prioritized"),
+                              default="jacobi", help="Bellman solver mode")
+    solve_parser.add_argument("--no-cache", action="store_true", help="always solve from scratch")
     
-    # Close visualization
-    visualizer.close()
+    args = parser.parse_args(argv)
+    COMMANDS[args.command](args)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,135 @@
+import numpy as np
+from analysis import win_time_distribution
+
+class MultiplayerEnv:
+    """Several players taking turns on one board, first to the last cell wins
+
+    Positions are kept in one array indexed by seat; seat 0 moves first.
+    Players do not interact, so moves use the board's transitions directly.
+    """
+
+    def __init__(self, env, num_players=2):
+        self.env = env
+        self.num_players = num_players
+        self.positions = np.empty(num_players, dtype=np.int32)
+        self.reset()
+
+    def reset(self):
+        """Put every player on the first cell and give seat 0 the turn"""
+        self.positions[:] = self.env.reset()
+        self.current_player = 0
+        self.winner = None
+        return self.positions.copy()
+
+    def step(self, action):
+        """Move the current player by a roll and pass the turn on
+
+        Returns ``(positions, reward, done, info)`` where the reward is the
+        moving player's and ``info`` has the "player" who moved and the
+        "winner", if any.
+        """
+        if self.winner is not None:
+            raise ValueError("The game is over, call reset() to start a new one")
+        player = self.current_player
+        new_position, reward = self.env.transition(int(self.positions[player]), int(action))
+        self.positions[player] = new_position
+        done = bool(new_position == self.env.board_size)
+        if done:
+            self.winner = player
+        else:
+            self.current_player = (player + 1) % self.num_players
+        return self.positions.copy(), float(reward), done, {"player": player, "winner": self.winner}
+
+    def get_state(self):
+        """Whose turn it is and everyone's position"""
+        return self.current_player, self.positions.copy()
+
+def simulate_multiplayer(env, policies, num_games, exploration_rate=0.1, seed=None,
+                         chunk_size=100_000, max_rounds=None):
+    """Play many multiplayer games at once, one seat's turn at a time
+
+    ``policies`` has one policy per seat, or None for a seat that rolls a
+    fair die, as in ``seat_win_probabilities``. Positions of a chunk of games are
+    a ``(games, players)`` array, and each turn moves that seat's token in
+    every game still running. Returns the winning seat of each game (-1 if
+    it was cut off after ``max_rounds`` rounds) and its length in moves,
+    counting every player's turns.
+    """
+    rng = np.random.default_rng(seed)
+    policies = [None if policy is None else np.asarray(policy) for policy in policies]
+    num_players = len(policies)
+
+    winners = []
+    lengths = []
+    remaining = num_games
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        remaining -= n
+
+        positions = np.full((n, num_players), env.reset(), dtype=np.int32)
+        winner = np.full(n, -1, dtype=np.int8)
+        moves = np.zeros(n, dtype=np.int64)
+        active = np.arange(n)  # Games nobody has won yet
+
+        rounds = 0
+        while active.size and (max_rounds is None or rounds < max_rounds):
+            for seat in range(num_players):
+                state = positions[active, seat]
+
+                if policies[seat] is None:
+                    rolls = rng.integers(1, 7, size=active.size)
+                else:
+                    # Add some randomness to the policy
+                    explore = rng.random(active.size) < exploration_rate
+                    rolls = np.where(explore, rng.integers(1, 7, size=active.size), policies[seat][state])
+
+                next_state = env.transition(state, rolls)[0]
+                positions[active, seat] = next_state
+                moves[active] += 1
+
+                won = next_state == env.board_size
+                winner[active[won]] = seat
+                active = active[~won]
+                if not active.size:
+                    break
+            rounds += 1
+
+        winners.append(winner)
+        lengths.append(moves)
+
+    if not winners:
+        return np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int64)
+    return np.concatenate(winners), np.concatenate(lengths)
+
+def seat_win_probabilities(env, policies, exploration_rate=0.1, tail_mass=1e-12):
+    """Exact win probability of each seat and distribution of the game length
+
+    Players move independently, so each seat's number of own turns to
+    finish, ``T_i``, follows its single-player distribution. Seat ``i``
+    wins on its ``k``-th turn when ``T_i = k``, the seats before it need
+    more than ``k`` turns and the seats after it more than ``k - 1``.
+    Returns the per-seat win probabilities and ``length_pmf``, where
+    ``length_pmf[m]`` is the probability that the game lasts ``m`` moves
+    counting every player's turns.
+    """
+    num_players = len(policies)
+    pmfs = [win_time_distribution(env, policy, exploration_rate, tail_mass=tail_mass)[0]
+            for policy in policies]
+    turns = max(len(pmf) for pmf in pmfs)
+    pmfs = np.stack([np.pad(pmf, (0, turns - len(pmf))) for pmf in pmfs])
+    survival = 1.0 - np.cumsum(pmfs, axis=1)  # P(T_i > k)
+
+    # P(seat i wins on its k-th turn)
+    win_at = np.empty_like(pmfs)
+    for seat in range(num_players):
+        before = np.prod(survival[:seat], axis=0)
+        after = np.prod(survival[seat + 1:], axis=0)
+        after_previous = np.concatenate(([1.0], after[:-1]))
+        win_at[seat] = pmfs[seat] * before * after_previous
+
+    # Seat i winning on its k-th turn ends the game after (k - 1) * n + i + 1 moves
+    length_pmf = np.zeros(turns * num_players + 1)
+    k = np.arange(1, turns)
+    for seat in range(num_players):
+        length_pmf[(k - 1) * num_players + seat + 1] = win_at[seat, 1:]
+    return win_at.sum(axis=1), length_pmf
@@ -0,0 +1,53 @@
+# Plots written to the working directory by "main.py plot" and the analytics
+# process. Matplotlib is imported on first use with its non-interactive Agg
+# backend, so importing this module is cheap and never opens a window.
+
+def visualize_values(agent, env):
+    """Visualize the learned value function"""
+    import matplotlib
+    matplotlib.use("Agg")  # Only writes files, no window needed
+    import matplotlib.pyplot as plt
+    
+    values = agent.get_values()
+    policy = agent.get_policy()
+    
+    # Create a heatmap of the value function
+    plt.figure(figsize=(12, 8))
+    
+    # Plot value function
+    plt.subplot(2, 1, 1)
+    plt.plot(range(1, env.board_size + 1), values[1:])
+    plt.title('Value Function')
+    plt.xlabel('Position')
+    plt.ylabel('Value')
+    
+    # Plot policy
+    plt.subplot(2, 1, 2)
+    plt.bar(range(1, env.board_size + 1), policy[1:])
+    plt.title('Optimal Policy')
+    plt.xlabel('Position')
+    plt.ylabel('Dice Roll')
+    
+    plt.tight_layout()
+    plt.savefig('value_iteration_results.png')
+    plt.close()
+
+def plot_steps_distribution(stats):
+    """Plot the histogram of steps to win from a RunningStats summary"""
+    import matplotlib
+    matplotlib.use("Agg")  # Only writes files, no window needed
+    import matplotlib.pyplot as plt
+    
+    # Only the bins between the shortest and longest game
+    first = stats.min // stats.bin_width
+    last = min(stats.max // stats.bin_width, stats.num_bins - 1)
+    edges = stats.bin_edges()[first:last + 1]
+    
+    plt.figure(figsize=(10, 6))
+    plt.bar(edges, stats.histogram[first:last + 1], width=stats.bin_width, align='edge',
+            edgecolor='black')
+    plt.title('Distribution of Steps to Win')
+    plt.xlabel('Number of Steps')
+    plt.ylabel('Frequency')
+    plt.savefig('steps_distribution.png')
+    plt.close()
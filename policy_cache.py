@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from bellman import SOLVER_VERSION
+
+def board_fingerprint(env, gamma, theta, method="jacobi"):
+    """Hash everything that determines a solved value function and policy
+
+    Includes ``env.sparse``, which selects float32/uint8 arrays, and the
+    solver method, so each method's solution is cached separately.
+    """
+    key = {
+        "board_size": env.board_size,
+        "sparse": env.sparse,
+        "method": method,
+        "snakes": sorted(env.snakes.items()),
+        "ladders": sorted(env.ladders.items()),
+        "gamma": gamma,
+        "theta": theta,
+        "solver_version": SOLVER_VERSION,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+class PolicyCache:
+    """On-disk cache of solved values and policies, one directory per board
+
+    Each entry holds ``values.npy`` and ``policy.npy`` so it can be loaded
+    with memory mapping. Entries are written to a temporary directory and
+    renamed into place, so concurrent writers and readers never see a
+    partial entry. Least recently used entries are evicted once the cache
+    grows beyond ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key, mmap_mode="c"):
+        """Return ``(values, policy)`` for a key, or None on a cache miss"""
+        path = self._entry_path(key)
+        try:
+            values = np.load(os.path.join(path, "values.npy"), mmap_mode=mmap_mode)
+            policy = np.load(os.path.join(path, "policy.npy"), mmap_mode=mmap_mode)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None  # Missing, evicted or unreadable entries count as misses
+        return values, policy
+
+    def store(self, key, values, policy):
+        """Atomically add an entry, then evict old entries if over budget"""
+        path = self._entry_path(key)
+        temp_path = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        np.save(os.path.join(temp_path, "values.npy"), values)
+        np.save(os.path.join(temp_path, "policy.npy"), policy)
+        try:
+            os.rename(temp_path, path)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(temp_path, ignore_errors=True)
+        self.evict()
+
+    def evict(self, stale_seconds=3600):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.stat(path).st_mtime
+                if name.startswith("."):
+                    # Leftovers from writers that died mid-store
+                    if time.time() - mtime > stale_seconds:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+            except OSError:
+                continue  # Removed by another process meanwhile
+            entries.append((mtime, size, name))
+            total += size
+
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Rename first so readers never see a half-deleted entry
+            trash_path = os.path.join(self.directory, f".trash-{name}-{os.getpid()}")
+            try:
+                os.rename(self._entry_path(name), trash_path)
+            except OSError:
+                continue
+            shutil.rmtree(trash_path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,148 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pygame
+from environment import SnakeAndLadderEnv
+from game_loop import GameLoop
+from value_iteration_agent import ValueIterationAgent
+from visualization import SnakeAndLadderVisualizer
+
+def record_game(env, agent=None, exploration_rate=0.0, seed=None, max_steps=10_000):
+    """Play one game and return its moves as (position after the move, dice) pairs
+
+    Rolls come from the agent's policy, or from a fair die without an agent;
+    with probability ``exploration_rate`` a random roll is used instead.
+    """
+    rng = np.random.default_rng(seed)
+    state = env.reset()
+    moves = []
+    done = False
+    while not done and len(moves) < max_steps:
+        if agent is None or rng.random() < exploration_rate:
+            dice = int(rng.integers(1, 7))
+        else:
+            dice = int(agent.choose_action(state))
+        state, _, done, _ = env.step(dice)
+        moves.append((state, dice))
+    return moves
+
+def replay_frames(visualizer, moves, snakes, ladders, fps=20, start=1, game_state="auto"):
+    """Draw a recorded game frame by frame, as fast as possible
+
+    Uses the GUI's animation timings at ``fps`` frames per second of replay
+    time. Yields the visualizer's screen after each frame is drawn; it is
+    the same Surface every time, so consume each frame before the next.
+    """
+    move_frames = max(1, round(GameLoop.MOVE_DURATION * fps))
+    finish_frames = round(GameLoop.FINISH_DURATION * fps)
+    frame = 0
+
+    def draw(position, steps, dice, moving_token=None):
+        visualizer.frame_time = frame * 1000 / fps
+        visualizer.draw_board(position, snakes, ladders, steps, dice, game_state,
+                              moving_token=moving_token)
+        return visualizer.screen
+
+    position = start
+    steps = 0
+    dice = 0
+    yield draw(position, steps, dice)
+    frame += 1
+
+    for next_position, dice in moves:
+        # Interpolate the token between the two cell centers
+        start_x, start_y = visualizer.get_cell_center(position)
+        end_x, end_y = visualizer.get_cell_center(next_position)
+        for i in range(1, move_frames + 1):
+            t = i / move_frames
+            moving_token = (start_x + (end_x - start_x) * t, start_y + (end_y - start_y) * t)
+            yield draw(position if i < move_frames else next_position, steps, dice, moving_token)
+            frame += 1
+        position = next_position
+        steps += 1
+
+    # Show final position for a moment
+    for _ in range(finish_frames):
+        yield draw(position, steps, dice)
+        frame += 1
+
+def write_png_sequence(frames, directory, prefix="frame"):
+    """Save each frame as a numbered PNG file and return the frame count"""
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, frame in enumerate(frames, 1):
+        pygame.image.save(frame, os.path.join(directory, f"{prefix}_{count - 1:05d}.png"))
+    return count
+
+def write_raw_stream(frames, stream):
+    """Write frames as packed RGB24 bytes, e.g. for ffmpeg's rawvideo input"""
+    count = 0
+    for count, frame in enumerate(frames, 1):
+        stream.write(pygame.image.tobytes(frame, "RGB"))
+    return count
+
+_worker_visualizer = None
+
+def _render_game(moves, snakes, ladders, output, fmt, fps, board_size):
+    """Render one game in a worker process, reusing its headless visualizer"""
+    global _worker_visualizer
+    if _worker_visualizer is None:
+        _worker_visualizer = SnakeAndLadderVisualizer(board_size, headless=True)
+    frames = replay_frames(_worker_visualizer, moves, snakes, ladders, fps)
+    if fmt == "png":
+        return write_png_sequence(frames, output)
+    with open(output, "wb") as stream:
+        return write_raw_stream(frames, stream)
+
+def render_games(games, output_dir, fmt="png", fps=20, board_size=100, workers=None):
+    """Render many recorded games in parallel on a process pool
+
+    ``games`` is an iterable of ``(moves, snakes, ladders)``. Game ``i`` goes
+    to ``output_dir/game_i`` as a PNG directory, or ``output_dir/game_i.rgb``
+    as a raw RGB24 stream when ``fmt`` is "raw". Yields ``(index, output
+    path, frame count)`` as games finish.
+    """
+    if fmt not in ("png", "raw"):
+        raise ValueError(f"Unknown replay format {fmt!r}, expected 'png' or 'raw'")
+    os.makedirs(output_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for index, (moves, snakes, ladders) in enumerate(games):
+            output = os.path.join(output_dir, f"game_{index:05d}" + (".rgb" if fmt == "raw" else ""))
+            future = pool.submit(_render_game, moves, snakes, ladders, output, fmt, fps, board_size)
+            futures[future] = (index, output)
+        for future in as_completed(futures):
+            index, output = futures[future]
+            yield index, output, future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Render agent games to frame sequences without a display")
+    parser.add_argument("--games", type=int, default=4, help="number of games to record and render")
+    parser.add_argument("--output", default="replays", help="output directory")
+    parser.add_argument("--format", choices=("png", "raw"), default="png")
+    parser.add_argument("--fps", type=int, default=20)
+    parser.add_argument("--exploration-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    env = SnakeAndLadderEnv()
+    agent = ValueIterationAgent(env)
+    seeds = np.random.SeedSequence(args.seed).spawn(args.games)
+    games = [(record_game(env, agent, args.exploration_rate, seed), env.snakes, env.ladders)
+             for seed in seeds]
+
+    start = time.perf_counter()
+    total_frames = 0
+    for index, output, frames in render_games(games, args.output, args.format, args.fps,
+                                              env.board_size, args.workers):
+        total_frames += frames
+        print(f"Game {index}: {frames} frames -> {output}")
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {total_frames} frames in {elapsed:.2f}s ({total_frames / elapsed:.0f} frames/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import numpy as np
+
+# SplitMix64: a stream's states step by GOLDEN_GAMMA and each state is
+# mixed into an output word. Counter-based dice use the mixed states of
+# their own counters, so any draw can be computed without the ones before.
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MASK64 = (1 << 64) - 1
+
+def mix64(x):
+    """SplitMix64 finalizer of uint64 values, spreads their bits across the word"""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def mix64_int(x):
+    """``mix64`` of one Python int, without NumPy's per-call overhead"""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import resource
+import time
+import numpy as np
+from sessions import SessionStore
+
+DEFAULT_PORT = 8765
+MAX_LINE = 4096  # Longest request line accepted, in bytes
+
+class GameServer:
+    """Hosts many games over local TCP, one JSON object per line each way
+
+    Every session plays on one read-only ``Board`` and gets hints and
+    automatic moves from one solved policy, and sessions are rows of a
+    ``SessionStore``, so an idle session costs a few dozen bytes.
+    Sessions are not tied to a connection: a client may open many and
+    play them over any connection. Requests are
+    ``{"op": ..., "session": id}`` plus any arguments, and replies echo the
+    request's "id" if it has one. Operations:
+
+    - "new": start a session, replies with "session" and "position"
+    - "roll", "move" with a "roll" of 1-6, "auto": move by a random die,
+      the given roll or the policy's roll, replies with "roll",
+      "position", "reward", "done" and "steps"
+    - "hint": the policy's "roll" without moving
+    - "state", "reset": the session's "position", "steps" and "done",
+      after moving back to the start for "reset"
+    - "end": drop the session
+    - "stats": number of "sessions", "connections", "moves" and the
+      server's peak resident memory "max_rss_kb"
+
+    Errors reply with an "error" message. Replies are written as soon as
+    each request is handled, and a connection whose client reads slower
+    than it sends stops being read once ``write_buffer_limit`` bytes of
+    replies are waiting, so a slow client cannot make the server buffer
+    without bound.
+    """
+
+    def __init__(self, env, agent, max_sessions=1_000_000, write_buffer_limit=64 * 1024, seed=None):
+        self.board = env.freeze()
+        self.policy = agent.get_policy().tolist()  # Lists index faster than arrays one at a time
+        self.max_sessions = max_sessions
+        self.write_buffer_limit = write_buffer_limit
+        self.sessions = SessionStore(self.board, seed=seed)
+        self.connections = 0
+        self.moves = 0
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, ready=None):
+        """Accept connections until cancelled; ``ready`` is called with the bound port"""
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        writer.transport.set_write_buffer_limits(high=self.write_buffer_limit)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b'{"error": "request line too long"}\n')
+                    break
+                if not line:
+                    break
+                writer.write(self.handle_line(line))
+                # Only waits when the client has fallen behind
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    def handle_line(self, line):
+        """Reply to one request line"""
+        try:
+            request = json.loads(line)
+            reply = self.handle(request)
+        except (ValueError, TypeError, AttributeError) as error:
+            request, reply = None, {"error": str(error)}
+        if isinstance(request, dict) and "id" in request:
+            reply["id"] = request["id"]
+        return json.dumps(reply).encode() + b"\n"
+
+    def handle(self, request):
+        op = request.get("op")
+        if op == "new":
+            if len(self.sessions) >= self.max_sessions:
+                return {"error": "too many sessions"}
+            session = int(self.sessions.open()[0])
+            return {"session": session, "position": int(self.sessions.positions[session])}
+        if op == "stats":
+            return {
+                "sessions": len(self.sessions),
+                "connections": self.connections,
+                "moves": self.moves,
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            }
+
+        session = request.get("session")
+        # JSON true and 2.0 are not session ids or rolls, though Python compares them equal
+        if type(session) is not int or session not in self.sessions:
+            return {"error": "unknown session"}
+        if op == "roll":
+            return self.move(session, self.sessions.roll(session))
+        if op == "move":
+            roll = request.get("roll")
+            if type(roll) is not int or not 1 <= roll <= 6:
+                return {"error": "roll must be 1-6"}
+            return self.move(session, roll)
+        position = int(self.sessions.positions[session])
+        if op == "auto":
+            return self.move(session, self.policy[position])
+        if op == "hint":
+            return {"roll": self.policy[position]}
+        if op == "reset":
+            self.sessions.reset(session)
+            position = int(self.sessions.positions[session])
+        if op in ("state", "reset"):
+            return {"position": position, "steps": int(self.sessions.steps[session]),
+                    "done": position == self.board.board_size}
+        if op == "end":
+            self.sessions.close(session)
+            return {}
+        return {"error": f"unknown op {op!r}"}
+
+    def move(self, session, roll):
+        if self.sessions.positions[session] == self.board.board_size:
+            return {"error": "game is over"}
+        position, reward, done = self.sessions.move(session, roll)
+        self.moves += 1
+        return {"roll": roll, "position": position, "reward": reward, "done": done,
+                "steps": int(self.sessions.steps[session])}
+
+async def _request(reader, writer, request):
+    writer.write(json.dumps(request).encode() + b"\n")
+    return json.loads(await reader.readline())
+
+async def _create_sessions(reader, writer, count, batch_size=1000):
+    """Open ``count`` sessions, pipelining a batch of requests at a time"""
+    sessions = []
+    for start in range(0, count, batch_size):
+        n = min(batch_size, count - start)
+        writer.write(b'{"op": "new"}\n' * n)
+        for _ in range(n):
+            sessions.append(json.loads(await reader.readline())["session"])
+    return sessions
+
+async def _load_client(host, port, num_sessions, moves, latencies):
+    """Play ``moves`` automatic moves round-robin over this client's sessions"""
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    sessions = await _create_sessions(reader, writer, num_sessions)
+    for move in range(moves):
+        session = sessions[move % num_sessions]
+        start = time.perf_counter()
+        reply = await _request(reader, writer, {"op": "auto", "session": session})
+        latencies.append(time.perf_counter() - start)
+        if reply.get("done"):
+            await _request(reader, writer, {"op": "reset", "session": session})
+    for session in sessions:
+        writer.write(json.dumps({"op": "end", "session": session}).encode() + b"\n")
+    for _ in sessions:
+        await reader.readline()
+    writer.close()
+    await writer.wait_closed()
+
+async def run_load(host="127.0.0.1", port=DEFAULT_PORT, clients=100, sessions=10, moves=1000,
+                   idle_sessions=0):
+    """Load-test a running server with closed-loop clients
+
+    Optionally opens ``idle_sessions`` sessions first and leaves them idle,
+    then ``clients`` connections each play ``moves`` automatic moves over
+    ``sessions`` sessions of their own, waiting for each reply before
+    sending the next request. Returns a dict with the move count, moves per
+    second, the p50 and p99 move latency in milliseconds and the server's
+    memory before and after the idle sessions were opened.
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    before = await _request(reader, writer, {"op": "stats"})
+    await _create_sessions(reader, writer, idle_sessions)
+    after = await _request(reader, writer, {"op": "stats"})
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_load_client(host, port, sessions, moves, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    writer.close()
+    await writer.wait_closed()
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {
+        "moves": len(latencies),
+        "moves_per_second": len(latencies) / elapsed,
+        "p50_ms": float(p50),
+        "p99_ms": float(p99),
+        "idle_sessions": after["sessions"] - before["sessions"],
+        "max_rss_kb": (before["max_rss_kb"], after["max_rss_kb"]),
+    }
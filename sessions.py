@@ -0,0 +1,127 @@
+import numpy as np
+from rng_utils import GOLDEN_GAMMA, MASK64, mix64, mix64_int
+
+class SessionStore:
+    """Struct-of-arrays state of many games on one shared ``Board``
+
+    Each game is a row of a few arrays: its position, its step count, its
+    own dice generator state and an open flag, 17 bytes plus 4 for the
+    free list. Session ids are row numbers; rows of closed sessions are
+    reused by later ``open`` calls, and the arrays double when full.
+    Methods take an array of distinct session ids and work on all of them
+    at once, or a single id, which skips NumPy's per-call overhead and
+    returns scalars, as a server handling one request at a time needs.
+    """
+
+    def __init__(self, board, capacity=1024, seed=None):
+        self.board = board
+        self.seeds = np.random.default_rng(seed)
+        self.positions = np.zeros(capacity, dtype=np.int32)
+        self.steps = np.zeros(capacity, dtype=np.int32)
+        self.rng_state = np.zeros(capacity, dtype=np.uint64)
+        self.is_open = np.zeros(capacity, dtype=bool)
+        # Stack of free rows, lowest on top
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self.num_free = capacity
+        self.num_open = 0
+
+    def __len__(self):
+        return self.num_open
+
+    def __contains__(self, session):
+        return 0 <= session < self.capacity and bool(self.is_open[session])
+
+    @property
+    def capacity(self):
+        return len(self.positions)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the per-game arrays"""
+        return sum(array.nbytes for array in (self.positions, self.steps, self.rng_state,
+                                              self.is_open, self.free))
+
+    def open(self, count=1):
+        """Start ``count`` games at the first cell, returns their session ids"""
+        while count > self.num_free:
+            self._grow()
+        sessions = self.free[self.num_free - count:self.num_free][::-1].copy()
+        self.num_free -= count
+        self.num_open += count
+        self.positions[sessions] = self.board.reset()
+        self.steps[sessions] = 0
+        self.rng_state[sessions] = self.seeds.integers(0, 2**64, size=count, dtype=np.uint64)
+        self.is_open[sessions] = True
+        return sessions
+
+    def close(self, sessions):
+        """End games, their rows go back on the free list"""
+        sessions = self._check(sessions)
+        count = np.size(sessions)
+        self.is_open[sessions] = False
+        self.free[self.num_free:self.num_free + count] = sessions
+        self.num_free += count
+        self.num_open -= count
+
+    def reset(self, sessions):
+        """Move games back to the first cell"""
+        sessions = self._check(sessions)
+        self.positions[sessions] = self.board.reset()
+        self.steps[sessions] = 0
+
+    def roll(self, sessions):
+        """Roll each game's own die, returns values 1-6"""
+        sessions = self._check(sessions)
+        if isinstance(sessions, int):
+            state = (int(self.rng_state[sessions]) + int(GOLDEN_GAMMA)) & MASK64
+            self.rng_state[sessions] = state
+            return mix64_int(state) % 6 + 1
+        state = self.rng_state[sessions] + GOLDEN_GAMMA
+        self.rng_state[sessions] = state
+        return (mix64(state) % np.uint64(6)).astype(np.int32) + 1
+
+    def move(self, sessions, rolls):
+        """Move games by the given rolls
+
+        Returns the new positions, the rewards and whether each game is
+        over. Games that are already over do not move or count a step.
+        """
+        sessions = self._check(sessions)
+        if isinstance(sessions, int):
+            position = int(self.positions[sessions])
+            if position == self.board.board_size:
+                return position, 0.0, True
+            next_position, reward = self.board.transition(position, int(rolls))
+            next_position = int(next_position)
+            self.positions[sessions] = next_position
+            self.steps[sessions] += 1
+            return next_position, float(reward), next_position == self.board.board_size
+        positions = self.positions[sessions]
+        next_positions, rewards = self.board.transition(positions, np.asarray(rolls))
+        self.positions[sessions] = next_positions
+        self.steps[sessions] += positions != self.board.board_size
+        return next_positions, rewards, next_positions == self.board.board_size
+
+    def _check(self, sessions):
+        if isinstance(sessions, (int, np.integer)):
+            if sessions not in self:
+                raise KeyError("unknown session")
+            return int(sessions)
+        sessions = np.atleast_1d(np.asarray(sessions, dtype=np.int64))
+        if sessions.size and (sessions.min() < 0 or sessions.max() >= self.capacity
+                              or not self.is_open[sessions].all()):
+            raise KeyError("unknown session")
+        return sessions
+
+    def _grow(self):
+        capacity = self.capacity
+        added = max(1, capacity)  # Double, starting from an empty store too
+        for name in ("positions", "steps", "rng_state", "is_open"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate((array, np.zeros(added, dtype=array.dtype))))
+        free = np.empty(capacity + added, dtype=np.int32)
+        # New rows go under the existing free ones, highest first
+        free[:added] = np.arange(capacity + added - 1, capacity - 1, -1, dtype=np.int32)
+        free[added:added + self.num_free] = self.free[:self.num_free]
+        self.free = free
+        self.num_free += added
@@ -0,0 +1,106 @@
+import numpy as np
+from rng_utils import GOLDEN_GAMMA, MASK64, mix64
+
+# 64-bit FNV-1a parameters for hashing paths one position at a time
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+def iter_simulations(env, policy, num_games, exploration_rate=0.1, seed=None,
+                     chunk_size=100_000, max_steps=None, record_paths=False, hash_paths=False,
+                     record_moves=False, common_random_numbers=False):
+    """Play games in fixed-size vectorized chunks, yielding each chunk's results
+
+    Every chunk advances up to ``chunk_size`` games at once as NumPy arrays,
+    so peak memory is bounded by the chunk size rather than ``num_games``.
+    Yields an array of steps-to-win per game, or a tuple of it followed by
+    the list of paths when ``record_paths`` is set and a uint64 hash of each
+    path when ``hash_paths`` is set. With ``record_moves`` it also has two
+    ``(games, moves)`` uint8 and int32 arrays of the rolls and the positions
+    after each move, padded with 0 and the final position, as taken by
+    ``GameLogWriter.append_batch``. Hashing keeps only one word per game,
+    where recording paths or moves keeps the chunk's whole history. Games
+    still running after ``max_steps`` moves are cut off there.
+
+    With ``common_random_numbers`` the exploration draws for game ``i``'s
+    move ``t`` depend only on ``(seed, i, t)``, through a hash of them, not
+    on which other games are still running, so policies simulated with the
+    same seed see identical dice streams and their results can be compared
+    pairwise. Only the games still running are drawn for, as without it.
+    """
+    rng = np.random.default_rng(seed)
+    policy = np.asarray(policy)
+    if common_random_numbers:
+        key = rng.integers(0, 2**64, dtype=np.uint64)
+        threshold = np.uint64(min(int(exploration_rate * 2.0**64), MASK64))
+
+    remaining = num_games
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        if common_random_numbers:
+            # Each game's own SplitMix64 stream, its t-th state drawn for move t
+            first_game = num_games - remaining
+            game_ids = np.arange(first_game, first_game + n, dtype=np.uint64)
+            game_keys = mix64(key + GOLDEN_GAMMA * game_ids)
+        remaining -= n
+
+        positions = np.full(n, env.reset(), dtype=np.int32)
+        steps = np.zeros(n, dtype=np.int64)
+        active = np.arange(n)  # Indices of games that are not finished yet
+        history = [positions.copy()] if record_paths or record_moves else None
+        roll_history = [] if record_moves else None
+        if hash_paths:
+            hashes = (np.full(n, FNV_OFFSET) ^ positions.astype(np.uint64)) * FNV_PRIME
+
+        step = 0
+        while active.size and (max_steps is None or step < max_steps):
+            state = positions[active]
+
+            # Add some randomness to the policy
+            if common_random_numbers:
+                offset = np.uint64((step + 1) * int(GOLDEN_GAMMA) & MASK64)
+                draws = mix64(game_keys[active] + offset)
+                explore = draws < threshold
+                random_rolls = (mix64(draws) % np.uint64(6)).astype(np.int32) + 1
+            else:
+                explore = rng.random(active.size) < exploration_rate
+                random_rolls = rng.integers(1, 7, size=active.size)
+            rolls = np.where(explore, random_rolls, policy[state])
+
+            next_state = env.transition(state, rolls)[0]
+            positions[active] = next_state
+            steps[active] += 1
+            step += 1
+            if history is not None:
+                history.append(positions.copy())
+            if record_moves:
+                move_rolls = np.zeros(n, dtype=np.uint8)
+                move_rolls[active] = rolls
+                roll_history.append(move_rolls)
+            if hash_paths:
+                hashes[active] = (hashes[active] ^ next_state.astype(np.uint64)) * FNV_PRIME
+
+            active = active[positions[active] != env.board_size]
+
+        results = [steps]
+        if history is not None:
+            history = np.stack(history, axis=1)
+        if record_paths:
+            results.append([history[i, :steps[i] + 1].tolist() for i in range(n)])
+        if hash_paths:
+            results.append(hashes)
+        if record_moves:
+            if roll_history:
+                results.append(np.stack(roll_history, axis=1))
+            else:
+                results.append(np.zeros((n, 0), dtype=np.uint8))
+            results.append(history[:, 1:])
+        yield results[0] if len(results) == 1 else tuple(results)
+
+def simulate_batch(env, policy, num_games, exploration_rate=0.1, seed=None,
+                   chunk_size=100_000, max_steps=None):
+    """Simulate many games at once and return the steps taken to win each one"""
+    chunks = list(iter_simulations(env, policy, num_games, exploration_rate,
+                                   seed, chunk_size, max_steps))
+    if not chunks:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(chunks)
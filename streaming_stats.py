@@ -0,0 +1,137 @@
+import numpy as np
+from rng_utils import mix64
+
+class RunningStats:
+    """Constant-memory summary of a stream of non-negative integers, e.g. steps to win
+
+    Tracks count, min, max, mean and variance (Chan et al.'s parallel
+    update) and a fixed-bin histogram of ``num_bins`` bins of width
+    ``bin_width``, the last of which also counts everything beyond it.
+    Quantiles are read off the histogram, so they are exact below
+    ``num_bins * bin_width`` for unit-width bins and approximate above it.
+    Two summaries with the same bins merge into the summary of both streams.
+    With ``num_bins=None`` there is no histogram, and values may be any
+    numbers, e.g. paired differences, but there are no quantiles.
+    """
+
+    def __init__(self, num_bins=1024, bin_width=1):
+        self.num_bins = num_bins
+        self.bin_width = bin_width
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.histogram = np.zeros(num_bins, dtype=np.int64) if num_bins else None
+
+    def update(self, values):
+        """Add an array of values"""
+        values = np.asarray(values)
+        if values.size == 0:
+            return self
+        other = RunningStats(self.num_bins, self.bin_width)
+        other.count = int(values.size)
+        other.min = values.min().item()
+        other.max = values.max().item()
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        if self.num_bins:
+            bins = np.minimum(values // self.bin_width, self.num_bins - 1)
+            other.histogram = np.bincount(bins, minlength=self.num_bins).astype(np.int64)
+        return self.merge(other)
+
+    def merge(self, other):
+        """Fold another summary with the same bins into this one"""
+        if (other.num_bins, other.bin_width) != (self.num_bins, self.bin_width):
+            raise ValueError("Cannot merge RunningStats with different histogram bins")
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.min, self.max = other.min, other.max
+        else:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        if self.num_bins:
+            self.histogram += other.histogram
+        return self
+
+    @property
+    def variance(self):
+        """Population variance, like np.var"""
+        return self.m2 / self.count if self.count else float("nan")
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    def _require_histogram(self):
+        if not self.num_bins:
+            raise ValueError("RunningStats has no histogram, create it with num_bins set")
+
+    def bin_edges(self):
+        self._require_histogram()
+        return np.arange(self.num_bins + 1) * self.bin_width
+
+    def quantile(self, q):
+        """Approximate q-quantile, the smallest bin whose cumulative count reaches q"""
+        self._require_histogram()
+        if self.count == 0:
+            return float("nan")
+        target = max(q * self.count, 1)
+        index = int(np.searchsorted(np.cumsum(self.histogram), target))
+        if index == self.num_bins - 1:
+            # The overflow bin only knows its values are at most the maximum
+            return self.max
+        return min(max(index * self.bin_width, self.min), self.max)
+
+class DistinctCounter:
+    """HyperLogLog estimate of the number of distinct 64-bit hashes seen
+
+    Uses ``2**precision`` one-byte registers, so memory is fixed however
+    many items are added; the relative error is about
+    ``1.04 / sqrt(2**precision)`` (0.8% at the default precision of 14).
+    Counters with the same precision merge by taking register maxima.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        """Add an array of uint64 hashes"""
+        hashes = mix64(np.asarray(hashes, dtype=np.uint64))
+        index = hashes >> np.uint64(64 - self.precision)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Rank is the position of the first set bit in the remaining bits
+        rank = (64 - self.precision) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge DistinctCounters with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Estimated number of distinct hashes added"""
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * np.log(m / zeros)
+        return float(raw)
+
+def _bit_length(x):
+    """Bit length of uint64 values, exact by converting 32-bit halves to float"""
+    high = (x >> np.uint64(32)).astype(np.float64)
+    low = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+from analysis import expected_turns
+from environment import SnakeAndLadderEnv
+from value_iteration_agent import ValueIterationAgent
+
+# Result arrays written by workers, one row per in-flight slot
+RESULT_ARRAYS = {
+    "values": np.float64,
+    "policy": np.int8,
+    "expected_turns": np.float64,
+}
+
+_worker_arrays = {}
+
+def _attach_results(names, shape):
+    """Pool initializer: map the shared result arrays into this worker"""
+    for key, name in names.items():
+        memory = shared_memory.SharedMemory(name=name)
+        _worker_arrays[key] = (memory, np.ndarray(shape, dtype=RESULT_ARRAYS[key], buffer=memory.buf))
+
+def _solve_layout(slot, board_size, snakes, ladders, gamma, theta, method, exploration_rate):
+    """Solve one layout and write its arrays into a shared-memory slot"""
+    env = SnakeAndLadderEnv(board_size, snakes, ladders)
+    agent = ValueIterationAgent(env, gamma=gamma, theta=theta, method=method)
+    turns = expected_turns(env, agent.policy, exploration_rate)
+
+    _worker_arrays["values"][1][slot] = agent.values
+    _worker_arrays["policy"][1][slot] = agent.policy
+    _worker_arrays["expected_turns"][1][slot] = turns
+    # The trajectory and per-state backups would be pickled back; send the scalars only
+    return {key: value for key, value in agent.solve_info.items() if isinstance(value, (int, float, str))}
+
+def sweep_layouts(layouts, board_size=100, gamma=0.9, theta=1e-6, method="jacobi",
+                  exploration_rate=0.1, workers=None, max_in_flight=None):
+    """Solve and evaluate many layouts in parallel, yielding results as they finish
+
+    ``layouts`` is any iterable of ``(snakes, ladders)`` pairs and is consumed
+    lazily. Each result is a dict with the layout's ``index`` in that
+    iterable, its ``snakes`` and ``ladders``, the ``values``, ``policy`` and
+    ``expected_turns`` arrays, the scalar entries of the solve's
+    ``solve_info`` and an ``error`` (None on success). Workers write the
+    arrays into shared memory instead of pickling them back.
+
+    A worker crash breaks every task in flight at the time, whether it is
+    noticed by a failed task or by a failed submit. Those tasks are retried
+    one at a time, so a layout that crashes its worker on its own is
+    reported with an error and the rest of the sweep carries on.
+    """
+    workers = workers or os.cpu_count() or 1
+    slots = max_in_flight or 2 * workers
+    shape = (slots, board_size + 1)
+
+    memories = {}
+    try:
+        arrays = {}
+        for key, dtype in RESULT_ARRAYS.items():
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            memories[key] = shared_memory.SharedMemory(create=True, size=size)
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=memories[key].buf)
+        names = {key: memory.name for key, memory in memories.items()}
+
+        def new_pool():
+            return ProcessPoolExecutor(max_workers=workers, initializer=_attach_results,
+                                       initargs=(names, shape))
+
+        layouts = enumerate(layouts)
+        free_slots = list(range(slots))
+        suspects = []  # Tasks that were in flight when a worker crashed
+        running = {}  # future -> (slot, index, snakes, ladders)
+        exhausted = False
+        pool = new_pool()
+
+        def submit(task):
+            """Start a task, returns False if the pool has broken"""
+            slot, _, snakes, ladders = task
+            try:
+                future = pool.submit(_solve_layout, slot, board_size, snakes, ladders,
+                                     gamma, theta, method, exploration_rate)
+            except BrokenProcessPool:
+                return False
+            running[future] = task
+            return True
+
+        try:
+            while True:
+                # Keep the pool busy, or run one suspect at a time on its own
+                unsubmitted = None
+                if suspects:
+                    if not running:
+                        task = suspects.pop()
+                        if not submit(task):
+                            unsubmitted = task
+                else:
+                    while free_slots and not exhausted:
+                        try:
+                            index, (snakes, ladders) = next(layouts)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        task = (free_slots.pop(), index, snakes, ladders)
+                        if not submit(task):
+                            unsubmitted = task
+                            break
+                if unsubmitted is not None:
+                    # A worker died after the last wait: everything in flight is suspect
+                    suspects.append(unsubmitted)
+                    suspects.extend(running.values())
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = new_pool()
+                    continue
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                alone = len(running) == 1
+                crashed = False
+                for future in done:
+                    slot, index, snakes, ladders = task = running.pop(future)
+                    result = {"index": index, "snakes": snakes, "ladders": ladders,
+                              "values": None, "policy": None, "expected_turns": None,
+                              "solve_info": None, "error": None}
+                    try:
+                        result["solve_info"] = future.result()
+                    except BrokenProcessPool:
+                        crashed = True
+                        if alone:
+                            # It crashed while running on its own, so it is the culprit
+                            result["error"] = "worker process crashed"
+                        else:
+                            suspects.append(task)
+                            continue
+                    except Exception as error:
+                        result["error"] = repr(error)
+                    else:
+                        for key in RESULT_ARRAYS:
+                            result[key] = arrays[key][slot].copy()
+                    free_slots.append(slot)
+                    yield result
+
+                if crashed:
+                    # Every other task in flight died with the pool too
+                    suspects.extend(running.values())
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = new_pool()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        for memory in memories.values():
+            memory.close()
+            memory.unlink()
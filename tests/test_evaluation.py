@@ -0,0 +1,36 @@
+import numpy as np
+from environment import SnakeAndLadderEnv
+from evaluation import evaluate_policies
+from simulation import iter_simulations
+from value_iteration_agent import ValueIterationAgent
+
+def test_common_random_numbers_pair_games_across_policies():
+    env = SnakeAndLadderEnv()
+    solved = ValueIterationAgent(env).get_policy()
+    ones = np.ones(env.board_size + 1, dtype=np.int64)
+
+    def steps(policy, chunk_size):
+        return np.concatenate(list(iter_simulations(env, policy, 5000, exploration_rate=1.0, seed=7,
+                                                    chunk_size=chunk_size, common_random_numbers=True)))
+
+    # Always exploring ignores the policy, so paired games roll the same dice
+    np.testing.assert_array_equal(steps(solved, 5000), steps(ones, 5000))
+    # Each game's dice do not depend on the other games in its chunk
+    np.testing.assert_array_equal(steps(ones, 5000), steps(ones, 1234))
+
+def test_paired_differences_of_one_policy_are_exact():
+    env = SnakeAndLadderEnv()
+    policy = ValueIterationAgent(env).get_policy()
+    specs = {"first": (policy, 0.1), "same": (policy, 0.1), "noisier": (policy, 0.15)}
+    # A width of 0 is never reached, so both runs play max_games
+    results, games = evaluate_policies(env, specs, ci_width=0.0, compare=True, max_games=20_000, seed=1)
+    assert games == 20_000
+    assert results["same"]["difference"] == 0.0
+    assert results["same"]["difference_half_width"] == 0.0
+    assert results["noisier"]["difference"] > 0
+
+    independent, _ = evaluate_policies(env, specs, ci_width=0.0, compare=True, max_games=20_000, seed=1,
+                                       common_random_numbers=False)
+    # Independent runs pay for both means' variances
+    assert independent["same"]["difference_half_width"] > 0
+    assert independent["noisier"]["difference_half_width"] > 1.5 * results["noisier"]["difference_half_width"]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from analysis import win_time_distribution
+from environment import SnakeAndLadderEnv, random_layout
+from finite_horizon_agent import FiniteHorizonAgent
+
+def brute_force(env, horizon, exploration_rate):
+    """Backward induction one cell and roll at a time"""
+    n = env.board_size
+    values = np.zeros(n + 1)
+    values[n] = 1.0
+    rows = []
+    for _ in range(horizon):
+        landing = [[values[env.transition(state, roll)[0]] for roll in range(1, 7)]
+                   for state in range(n)]
+        new = [(1 - exploration_rate) * max(row) + exploration_rate * np.mean(row) for row in landing]
+        values = np.append(new, 1.0)
+        rows.append(values)
+    return np.array(rows)
+
+def test_backward_induction_matches_brute_force():
+    env = SnakeAndLadderEnv(40, *random_layout(40, 4, 4, seed=2))
+    agent = FiniteHorizonAgent(env, horizon=12, exploration_rate=0.1)
+    expected = brute_force(env, 12, 0.1)
+    np.testing.assert_allclose(agent.get_values()[1:, 1:], expected[:, 1:], atol=1e-12)
+    # Each chosen roll achieves the best landing value with that many turns left
+    for turns_left in (1, 6, 12):
+        below = agent.get_values()[turns_left - 1]
+        for state in range(1, env.board_size):
+            best = max(below[env.transition(state, roll)[0]] for roll in range(1, 7))
+            chosen = below[env.transition(state, int(agent.choose_action(state, turns_left)))[0]]
+            assert chosen == best
+
+def test_fair_die_matches_the_win_time_distribution():
+    env = SnakeAndLadderEnv()
+    agent = FiniteHorizonAgent(env, horizon=30, exploration_rate=1.0, store_values=False)
+    cdf = win_time_distribution(env)[1]
+    assert agent.win_probability() == pytest.approx(cdf[30], abs=1e-12)
+    with pytest.raises(ValueError):
+        agent.win_probability(turns_left=10)
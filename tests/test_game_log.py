@@ -0,0 +1,57 @@
+import os
+import numpy as np
+from environment import SnakeAndLadderEnv
+from game_log import GameLog, GameLogWriter
+from simulation import iter_simulations
+
+def test_game_log_round_trip(tmp_path):
+    env = SnakeAndLadderEnv()
+    policy = np.ones(env.board_size + 1, dtype=np.int64)
+    path = str(tmp_path / "games.log")
+    chunks = list(iter_simulations(env, policy, 500, exploration_rate=0.5, seed=2, chunk_size=200,
+                                   max_steps=60, record_moves=True))
+    with GameLogWriter(path, env.board_size) as writer:
+        for steps, rolls, positions in chunks:
+            writer.append_batch(steps, rolls, positions)
+        writer.append([6, 2], [7, 9])
+
+    log = GameLog(path)
+    steps = np.concatenate([chunk[0] for chunk in chunks])
+    assert len(log) == 501
+    np.testing.assert_array_equal(log.steps, np.append(steps, 2))
+    games = [(rolls[i, :n], positions[i, :n]) for n_games, rolls, positions in chunks
+             for i, n in enumerate(n_games)]
+    for i, ((dice, path_positions), (expected_dice, expected_positions)) in enumerate(zip(log, games)):
+        np.testing.assert_array_equal(dice, expected_dice)
+        np.testing.assert_array_equal(path_positions, expected_positions)
+        assert log.finished(i) == (expected_positions.size > 0
+                                   and expected_positions[-1] == env.board_size)
+    dice, positions = log[500]
+    assert dice.tolist() == [6, 2] and positions.tolist() == [7, 9] and not log.finished(500)
+
+def test_steps_statistics_leave_out_cut_off_games(tmp_path):
+    path = str(tmp_path / "games.log")
+    with GameLogWriter(path, 100) as writer:
+        writer.append([6, 6], [7, 100])  # Won in 2 steps
+        writer.append([1] * 5, [2, 3, 4, 5, 6])  # Cut off after 5
+        writer.append([5, 5, 5], [6, 11, 100])
+    log = GameLog(path)
+    assert log.won().tolist() == [True, False, True]
+    stats = log.steps_statistics()
+    assert (stats.count, stats.min, stats.max, stats.mean) == (2, 2, 3, 2.5)
+
+def test_log_without_index_is_reindexed(tmp_path):
+    path = str(tmp_path / "games.log")
+    with GameLogWriter(path, 300) as writer:
+        writer.append([3, 4], [4, 250])
+        writer.append([], [])
+        writer.append([6], [300])
+    indexed = GameLog(path)
+    expected = np.array(indexed.index)
+    os.remove(path + ".idx")
+    with open(path, "ab") as f:
+        f.write(b"\x09\x00\x00\x00\x01\x00\x00\x00\x01")  # A record cut short
+
+    log = GameLog(path)
+    np.testing.assert_array_equal(log.index, expected)
+    assert log[2][0].tolist() == [6] and log[2][1].tolist() == [300] and log.won(2).tolist() == [True]
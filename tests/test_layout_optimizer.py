@@ -0,0 +1,30 @@
+import numpy as np
+from environment import SnakeAndLadderEnv
+from layout_optimizer import LayoutEvaluator, _propose, layout_moments
+
+def test_layout_evaluator_matches_layout_moments():
+    env = SnakeAndLadderEnv()
+    evaluator = LayoutEvaluator(env)
+    rng = np.random.default_rng(1)
+    checked = 0
+    while checked < 50:
+        proposal = _propose(env.snakes, env.ladders, env.board_size, rng)
+        if proposal is None:
+            continue
+        snakes, ladders, changes = proposal
+        moments = evaluator.evaluate(changes)
+        try:
+            expected = layout_moments(SnakeAndLadderEnv(env.board_size, snakes, ladders))
+        except np.linalg.LinAlgError:
+            expected = None
+        if moments is None or expected is None:
+            continue
+        np.testing.assert_allclose(moments, expected, rtol=1e-8)
+
+        # Every other move is applied, so later ones start from updated layouts
+        if checked % 2 == 0:
+            env.update_layout(snakes, ladders)
+            evaluator.apply(changes, moments)
+            np.testing.assert_allclose((evaluator.mean, evaluator.variance), layout_moments(env),
+                                       rtol=1e-8)
+        checked += 1
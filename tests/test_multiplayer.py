@@ -0,0 +1,27 @@
+import numpy as np
+from environment import SnakeAndLadderEnv
+from multiplayer import MultiplayerEnv, seat_win_probabilities, simulate_multiplayer
+from value_iteration_agent import ValueIterationAgent
+
+def test_simulated_seat_wins_match_the_exact_probabilities():
+    env = SnakeAndLadderEnv()
+    policy = ValueIterationAgent(env).get_policy()
+    policies = [None, policy, None]  # None rolls a fair die
+    num_games = 200_000
+    exact, length_pmf = seat_win_probabilities(env, policies)
+    winners, moves = simulate_multiplayer(env, policies, num_games, seed=4)
+
+    assert abs(exact.sum() - 1) < 1e-9
+    observed = np.bincount(winners, minlength=3) / num_games
+    # Within 4 standard errors of the exact probabilities
+    np.testing.assert_array_less(np.abs(observed - exact), 4 * np.sqrt(exact * (1 - exact) / num_games))
+    mean_moves = (np.arange(len(length_pmf)) * length_pmf).sum()
+    assert abs(moves.mean() - mean_moves) < 4 * moves.std() / np.sqrt(num_games)
+
+def test_turns_pass_round_the_table_until_someone_wins():
+    env = MultiplayerEnv(SnakeAndLadderEnv(), num_players=2)
+    positions, _, done, info = env.step(3)  # Seat 0 takes the ladder at 4
+    assert positions.tolist() == [14, 1] and info == {"player": 0, "winner": None} and not done
+    positions, _, _, info = env.step(1)
+    assert positions.tolist() == [14, 2] and info["player"] == 1
+    assert env.get_state()[0] == 0
@@ -0,0 +1,48 @@
+import os
+import numpy as np
+from environment import SnakeAndLadderEnv
+from policy_cache import PolicyCache, board_fingerprint
+from value_iteration_agent import ValueIterationAgent
+
+def test_agent_reuses_a_cached_solution(tmp_path):
+    cache = PolicyCache(str(tmp_path))
+    env = SnakeAndLadderEnv()
+    solved = ValueIterationAgent(env, cache=cache)
+    assert solved.solve_info is not None
+
+    cached = ValueIterationAgent(env, cache=cache)
+    assert cached.solve_info is None  # Loaded, not solved
+    np.testing.assert_array_equal(cached.get_values(), solved.get_values())
+    np.testing.assert_array_equal(cached.get_policy(), solved.get_policy())
+
+def test_fingerprint_separates_what_changes_the_solution():
+    env = SnakeAndLadderEnv()
+    keys = {
+        board_fingerprint(env, 0.9, 1e-6),
+        board_fingerprint(env, 0.9, 1e-6, method="prioritized"),
+        board_fingerprint(env, 0.8, 1e-6),
+        board_fingerprint(SnakeAndLadderEnv(sparse=True), 0.9, 1e-6),
+        board_fingerprint(SnakeAndLadderEnv(snakes={16: 5}), 0.9, 1e-6),
+    }
+    assert len(keys) == 5
+    assert board_fingerprint(SnakeAndLadderEnv(), 0.9, 1e-6) in keys
+
+def test_cache_misses_and_evicts_least_recently_used(tmp_path):
+    values, policy = np.zeros(1000), np.ones(1000, dtype=np.int64)
+    cache = PolicyCache(str(tmp_path), max_bytes=10**9)
+    assert cache.load("a") is None
+
+    cache.store("a", values, policy)
+    entry_bytes = sum(entry.stat().st_size for entry in os.scandir(tmp_path / "a"))
+    cache.max_bytes = 2 * entry_bytes  # Room for two entries
+    cache.store("b", values, policy)
+    os.utime(tmp_path / "a", (0, 0))
+    os.utime(tmp_path / "b", (1, 1))
+    cache.load("a")  # Now the most recently used
+    cache.store("c", values, policy)
+
+    assert cache.load("b") is None
+    loaded = cache.load("a")
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded[1], policy)
+    assert cache.load("c") is not None
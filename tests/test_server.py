@@ -0,0 +1,66 @@
+import asyncio
+import json
+import pytest
+from environment import SnakeAndLadderEnv
+from server import GameServer
+from value_iteration_agent import ValueIterationAgent
+
+@pytest.fixture(scope="module")
+def solved():
+    env = SnakeAndLadderEnv()
+    return env, ValueIterationAgent(env)
+
+def request(server, **fields):
+    return json.loads(server.handle_line(json.dumps(fields).encode()))
+
+def test_protocol_plays_a_game(solved):
+    env, agent = solved
+    server = GameServer(env, agent, seed=0)
+    reply = request(server, op="new", id=7)
+    assert reply == {"session": 0, "position": 1, "id": 7}
+
+    assert request(server, op="hint", session=0) == {"roll": int(agent.get_policy()[1])}
+    reply = request(server, op="move", session=0, roll=3)
+    assert (reply["position"], reply["steps"], reply["done"]) == (14, 1, False)  # Ladder at 4
+    while not reply["done"]:
+        reply = request(server, op="auto", session=0)
+    assert reply["position"] == env.board_size
+    assert request(server, op="auto", session=0) == {"error": "game is over"}
+
+    assert request(server, op="reset", session=0) == {"position": 1, "steps": 0, "done": False}
+    assert request(server, op="end", session=0) == {}
+    assert request(server, op="state", session=0) == {"error": "unknown session"}
+    assert request(server, op="stats")["sessions"] == 0
+
+def test_protocol_rejects_bad_requests(solved):
+    server = GameServer(*solved, max_sessions=1)
+    session = request(server, op="new")["session"]
+    assert request(server, op="new") == {"error": "too many sessions"}
+    for roll in (0, 7, 2.0, True, "3", None):
+        assert request(server, op="move", session=session, roll=roll) == {"error": "roll must be 1-6"}
+    for bad in (True, 1.0, -1, 99, "0"):
+        assert request(server, op="state", session=bad) == {"error": "unknown session"}
+    assert request(server, op="fly", session=session) == {"error": "unknown op 'fly'"}
+    assert "error" in json.loads(server.handle_line(b"not json\n"))
+    assert "error" in json.loads(server.handle_line(b"[1, 2]\n"))
+
+def test_server_answers_over_tcp(solved):
+    async def run():
+        server = GameServer(*solved, seed=1)
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(server.serve(port=0, ready=ready.set_result))
+        port = await ready
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        # Pipelined requests are answered in order
+        writer.write(b'{"op": "new", "id": 1}\n{"op": "roll", "session": 0, "id": 2}\n')
+        replies = [json.loads(await reader.readline()) for _ in range(2)]
+        writer.write(b"x" * 5000 + b"\n")
+        too_long = json.loads(await reader.readline())
+        writer.close()
+        task.cancel()
+        return replies, too_long
+
+    (new, roll), too_long = asyncio.run(run())
+    assert new["id"] == 1 and new["session"] == 0
+    assert roll["id"] == 2 and 1 <= roll["roll"] <= 6 and roll["steps"] == 1
+    assert too_long == {"error": "request line too long"}
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from environment import SnakeAndLadderEnv
+from sessions import SessionStore
+
+def test_board_is_a_read_only_snapshot():
+    env = SnakeAndLadderEnv()
+    board = env.freeze()
+    env.update_layout(snakes={})
+    assert 16 in board.snakes and board.jump[16] == 6
+    with pytest.raises(AttributeError):
+        board.board_size = 10
+    with pytest.raises(TypeError):
+        board.snakes[5] = 1
+    with pytest.raises(ValueError):
+        board.jump[16] = 16
+
+def test_sessions_reuse_rows_and_grow():
+    store = SessionStore(SnakeAndLadderEnv().freeze(), capacity=0, seed=0)
+    first = store.open(3)
+    assert first.tolist() == [0, 1, 2] and len(store) == 3
+    store.close(first[1])
+    assert 1 not in store and len(store) == 2
+    assert store.open().tolist() == [1]  # Freed rows are reused, lowest first
+    more = store.open(10)
+    assert store.capacity >= 13 and len(set(more.tolist()) | {0, 1, 2}) == 13
+    with pytest.raises(KeyError):
+        store.close([0, 99])
+    with pytest.raises(KeyError):
+        store.roll(-1)
+
+def test_single_and_batch_calls_agree():
+    board = SnakeAndLadderEnv().freeze()
+    one, batch = SessionStore(board, seed=5), SessionStore(board, seed=5)
+    sessions = one.open(50)
+    batch.open(50)
+    for _ in range(30):
+        rolls = batch.roll(sessions)
+        assert rolls.tolist() == [one.roll(int(session)) for session in sessions]
+        positions, rewards, done = batch.move(sessions, rolls)
+        for session, roll, position, reward in zip(sessions.tolist(), rolls.tolist(),
+                                                   positions.tolist(), rewards.tolist()):
+            assert one.move(session, roll)[:2] == (position, reward)
+    np.testing.assert_array_equal(one.positions, batch.positions)
+    np.testing.assert_array_equal(one.steps, batch.steps)
+    # Finished games stop counting steps
+    finished = batch.positions[sessions] == board.board_size
+    assert finished.any() and (batch.steps[sessions][finished] <= 30).all()
+    assert (batch.steps[sessions][~finished] == 30).all()
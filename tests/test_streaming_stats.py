@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from streaming_stats import RunningStats
+
+@pytest.mark.parametrize("num_bins", [64, None])
+def test_running_stats_merge_matches_single_update(num_bins):
+    rng = np.random.default_rng(3)
+    values = rng.integers(0, 40, size=10_000)
+    parts = np.split(values, [0, 1, 2_500, 7_000])
+    merged = RunningStats(num_bins)
+    for part in parts:
+        merged.merge(RunningStats(num_bins).update(part))
+    single = RunningStats(num_bins).update(values)
+
+    assert (merged.count, merged.min, merged.max) == (single.count, single.min, single.max)
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.variance == pytest.approx(values.var())
+    if num_bins:
+        np.testing.assert_array_equal(merged.histogram, single.histogram)
+        for q in (0.1, 0.5, 0.9):
+            # Unit bins past the largest value make the quantiles exact
+            assert merged.quantile(q) == np.quantile(values, q, method="inverted_cdf")
+
+def test_quantiles_need_a_histogram():
+    stats = RunningStats(num_bins=None).update([-1.5, 2.0])
+    with pytest.raises(ValueError):
+        stats.quantile(0.5)
+    with pytest.raises(ValueError):
+        stats.bin_edges()
@@ -0,0 +1,45 @@
+import os
+import threading
+import time
+from environment import random_layout
+from sweep import sweep_layouts
+
+def _exit_soon(delay):
+    """Stands in for a layout: kills the worker ``delay`` seconds after it is unpickled"""
+    threading.Timer(delay, os._exit, (1,)).start()
+    return {}
+
+class CrashingLayout(dict):
+    """Snakes that kill the worker that unpickles them, at once or after ``delay`` seconds"""
+
+    def __init__(self, delay=None):
+        super().__init__()
+        self.delay = delay
+
+    def __reduce__(self):
+        if self.delay is None:
+            return os._exit, (1,)
+        return _exit_soon, (self.delay,)
+
+def test_sweep_reports_the_layout_that_crashes_its_worker():
+    layouts = [random_layout(100, 8, 8, seed=seed) for seed in range(12)]
+    layouts[5] = (CrashingLayout(), {})
+    results = {result["index"]: result for result in sweep_layouts(layouts, workers=2)}
+    assert sorted(results) == list(range(12))
+    assert results[5]["error"] == "worker process crashed"
+    for index, result in results.items():
+        if index != 5:
+            assert result["error"] is None
+            assert result["policy"].shape == (101,)
+            assert "trajectory" not in result["solve_info"]
+
+def test_sweep_resubmits_when_the_pool_breaks_between_tasks():
+    layouts = [random_layout(100, 8, 8, seed=seed) for seed in range(4)]
+    layouts[0] = (CrashingLayout(delay=0.1), {})
+    results = []
+    for result in sweep_layouts(layouts, workers=1, max_in_flight=1):
+        results.append(result)
+        if len(results) == 1:
+            time.sleep(0.5)  # The worker dies while idle, so the next submit fails
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert all(result["error"] is None for result in results)
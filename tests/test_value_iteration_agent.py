@@ -0,0 +1,21 @@
+import numpy as np
+from environment import SnakeAndLadderEnv, random_layout
+from value_iteration_agent import ValueIterationAgent
+
+def test_update_layout_matches_fresh_solve():
+    board_size = 20_000
+    snakes, ladders = random_layout(board_size, 400, 400, seed=0)
+    agent = ValueIterationAgent(SnakeAndLadderEnv(board_size, snakes, ladders))
+
+    # Move one ladder's end a few cells up the board
+    ladders = dict(ladders)
+    start = sorted(ladders)[len(ladders) // 2]
+    ends = set(snakes.values()) | set(ladders.values())
+    ladders[start] = next(end for end in range(ladders[start] + 1, board_size)
+                          if end not in snakes and end not in ladders and end not in ends)
+    info = agent.update_layout(ladders=ladders)
+
+    fresh = ValueIterationAgent(SnakeAndLadderEnv(board_size, snakes, ladders))
+    assert info["backups"] < fresh.solve_info["backups"]
+    np.testing.assert_allclose(agent.get_values(), fresh.get_values(), atol=1e-5)
+    np.testing.assert_array_equal(agent.get_policy(), fresh.get_policy())
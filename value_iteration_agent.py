@@ -1,12 +1,18 @@
 import numpy as np
+from bellman import solve
+from policy_cache import board_fingerprint
 
 class ValueIterationAgent:
-    def __init__(self, env, gamma=0.9, theta=1e-6):
+    def __init__(self, env, gamma=0.9, theta=1e-6, method="jacobi", cache=None):
         self.env = env
         self.gamma = gamma  # discount factor
         self.theta = theta  # threshold for convergence
-        self.values = np.zeros(env.board_size + 1)  # Value function
-        self.policy = np.zeros(env.board_size + 1, dtype=int)  # Policy
+        self.method = method  # "jacobi", "gauss-seidel", "policy-iteration" or "prioritized"
+        self.solve_info = None  # Iterations, backups, residuals and wall time of the last solve
+        self.cache = cache  # Optional PolicyCache shared between runs
+        # Large sparse boards store compact float32 values and uint8 policies
+        self.values = np.zeros(env.board_size + 1, dtype=np.float32 if env.sparse else float)  # Value function
+        self.policy = np.zeros(env.board_size + 1, dtype=np.uint8 if env.sparse else int)  # Policy
         
         # Initialize values for terminal states
         self.values[env.board_size] = 1.0  # Win state
@@ -15,59 +21,58 @@ class ValueIterationAgent:
         for ladder_start in env.ladders:
             self.values[ladder_start] = 0.5  # Ladder states
         
+        # Reuse a cached solution for this board if there is one
+        if cache is not None:
+            key = board_fingerprint(env, gamma, theta, method)
+            cached = cache.load(key)
+            if cached is not None:
+                self.values, self.policy = cached
+                return
+        
         # Run value iteration
         self.value_iteration()
+        if cache is not None:
+            cache.store(key, self.values, self.policy)
+    
+    def active_states(self):
+        """Mask of the states the solver updates"""
+        # Skip the final cell and states that lead to immediate transitions
+        active = np.zeros(self.env.board_size + 1, dtype=bool)
+        active[1:self.env.board_size] = True
+        active[list(self.env.snakes)] = False
+        active[list(self.env.ladders)] = False
+        return active
     
     def value_iteration(self):
         """Perform value iteration to find optimal policy"""
-        while True:
-            delta = 0
-            # Iterate through all states
-            for state in range(1, self.env.board_size):
-                if state in self.env.snakes or state in self.env.ladders:
-                    continue  # Skip states that lead to immediate transitions
-                
-                old_value = self.values[state]
-                # Find best action for current state
-                best_value = float('-inf')
-                best_action = 1
-                
-                for action in range(1, 7):  # Possible dice rolls
-                    # Calculate expected value for this action
-                    next_state = min(state + action, self.env.board_size)
-                    
-                    # Handle snakes and ladders
-                    if next_state in self.env.snakes:
-                        next_state = self.env.snakes[next_state]
-                    elif next_state in self.env.ladders:
-                        next_state = self.env.ladders[next_state]
-                    
-                    # Calculate reward
-                    if next_state == self.env.board_size:
-                        reward = 1.0
-                    elif next_state in self.env.snakes:
-                        reward = -0.5
-                    elif next_state in self.env.ladders:
-                        reward = 0.5
-                    else:
-                        reward = 0.0
-                    
-                    # Calculate value
-                    value = reward + self.gamma * self.values[next_state]
-                    
-                    if value > best_value:
-                        best_value = value
-                        best_action = action
-                
-                # Update value and policy
-                self.values[state] = best_value
-                self.policy[state] = best_action
-                
-                delta = max(delta, abs(old_value - self.values[state]))
-            
-            # Check for convergence
-            if delta < self.theta:
-                break
+        # Back up all states at once over the environment's transition table
+        self.solve_info = solve(self.env, self.values, self.policy, self.active_states(),
+                                gamma=self.gamma, theta=self.theta, method=self.method)
+        return self.solve_info
+    
+    def update_layout(self, snakes=None, ladders=None):
+        """Change snakes and/or ladders and re-solve from the current solution
+        
+        Only the states whose moves changed are queued, and prioritized
+        sweeping propagates the change from there, so a small edit costs a
+        small fraction of a full solve's backups (see solve_info["backups"]).
+        """
+        changed = self.env.update_layout(snakes, ladders)
+        
+        # Pin new snake and ladder starts like __init__ does; freed cells get solved
+        for cell in changed.tolist():
+            if cell in self.env.snakes:
+                self.values[cell], self.policy[cell] = -0.5, 0
+            elif cell in self.env.ladders:
+                self.values[cell], self.policy[cell] = 0.5, 0
+        seeds = np.array(sorted(self.env.landing_sources(changed) | set(changed.tolist())), dtype=np.int64)
+        
+        self.solve_info = solve(self.env, self.values, self.policy, self.active_states(),
+                                gamma=self.gamma, theta=self.theta, method="prioritized", seeds=seeds)
+        if self.cache is not None:
+            self.cache.store(board_fingerprint(self.env, self.gamma, self.theta, self.method),
+                             self.values, self.policy)
+        return self.solve_info
     
     def choose_action(self, state):
         """Choose action based on the learned policy"""
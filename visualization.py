@@ -1,11 +1,30 @@
+import os
 import pygame
 import numpy as np
 import math
 import random
 
 class SnakeAndLadderVisualizer:
-    def __init__(self, board_size=100):
-        pygame.init()
+    def __init__(self, board_size=100, dirty_rects=True, headless=False):
+        if headless:
+            # Render offscreen with SDL's dummy video driver, no display needed.
+            # SDL reads the variable when the display starts, so it is only set
+            # for that and later windows in this process get the real driver.
+            previous = os.environ.get("SDL_VIDEODRIVER")
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            try:
+                pygame.init()
+            finally:
+                if previous is None:
+                    del os.environ["SDL_VIDEODRIVER"]
+                else:
+                    os.environ["SDL_VIDEODRIVER"] = previous
+        else:
+            if (pygame.display.get_init() and pygame.display.get_driver() == "dummy"
+                    and os.environ.get("SDL_VIDEODRIVER") != "dummy"):
+                pygame.display.quit()  # Still on a headless visualizer's dummy driver
+            pygame.init()
+        self.headless = headless
         self.board_size = board_size
         self.cell_size = 70
         self.margin = 30
@@ -34,8 +53,12 @@ class SnakeAndLadderVisualizer:
         self.DICE_SHADOW = (200, 200, 200)
         
         # Initialize screen
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption("Snake and Ladder Game")
+        if headless:
+            pygame.display.set_mode((1, 1))  # Surface.convert needs a display mode
+            self.screen = pygame.Surface((self.width, self.height))
+        else:
+            self.screen = pygame.display.set_mode((self.width, self.height))
+            pygame.display.set_caption("Snake and Ladder Game")
         
         # Fonts
         self.cell_font = pygame.font.Font(None, 28)
@@ -44,17 +67,6 @@ class SnakeAndLadderVisualizer:
         self.title_font = pygame.font.Font(None, 48)
         self.dice_font = pygame.font.Font(None, 36)
         
-        # Load dice images
-        self.dice_images = []
-        for i in range(1, 7):
-            dice = pygame.Surface((40, 40))
-            dice.fill(self.WHITE)
-            pygame.draw.rect(dice, self.BLACK, (0, 0, 40, 40), 2)
-            dots = self._get_dice_dots(i)
-            for dot in dots:
-                pygame.draw.circle(dice, self.BLACK, dot, 4)
-            self.dice_images.append(dice)
-        
         # Button positions and states
         self.button_height = 40
         self.button_width = 120
@@ -89,6 +101,13 @@ class SnakeAndLadderVisualizer:
         self.dice_margin = 10
         self.dice_animation_frames = 10
         self.dice_rotation_angle = 0
+        self.dice_rotation_step = 5  # Degrees between animation frames
+        self.dice_spin_speed = 100  # Degrees per second
+        self.frame_time = None  # Animation clock in ms; None follows pygame's clock
+        
+        # Pre-rotated dice sprites: face -> one (surface, x offset, y offset)
+        # per rotation step, rendered the first time a face is drawn
+        self.dice_atlas = {}
         
         # Create dice surface
         self.dice_surface = pygame.Surface((self.dice_size, self.dice_size))
@@ -100,6 +119,20 @@ class SnakeAndLadderVisualizer:
             "auto": (0, 200, 0),
             "roll": (0, 0, 200)
         }
+        
+        # Pre-rendered static board layer, rebuilt when the layout or window changes
+        self.static_layer = None
+        self.static_layer_key = None
+        
+        # Dirty-rectangle display updates: only regions whose content changed
+        # since the last frame are pushed to the display
+        self.dirty_rects = dirty_rects
+        self.regions = {}  # Region name -> (rect, content signature) last frame
+        self.pending_rects = []
+        self.full_update = True
+        self.last_update_pixels = 0  # Pixels pushed to the display by the last frame
+        self.frames_presented = 0
+        self.pixels_presented = 0
     
     def _get_dice_dots(self, number):
         """Return positions of dots for dice face"""
@@ -127,8 +160,9 @@ class SnakeAndLadderVisualizer:
         y = (9 - row) * self.cell_size + self.margin + 30 + self.cell_size // 2  # Added offset for title
         return (x, y)
     
-    def draw_snake(self, start_pos, end_pos):
+    def draw_snake(self, start_pos, end_pos, surface=None):
         """Draw a realistic snake between two positions"""
+        surface = self.screen if surface is None else surface
         start_x, start_y = start_pos
         end_x, end_y = end_pos
         
@@ -161,19 +195,20 @@ class SnakeAndLadderVisualizer:
             color = self.SNAKE_COLOR
             if i > len(points) * 0.8:  # Make head portion lighter
                 color = self.SNAKE_HEAD_COLOR
-            pygame.draw.line(self.screen, color, points[i], points[i+1], 6)
+            pygame.draw.line(surface, color, points[i], points[i+1], 6)
         
         # Draw snake head
-        pygame.draw.circle(self.screen, self.SNAKE_HEAD_COLOR, points[-1], 8)
+        pygame.draw.circle(surface, self.SNAKE_HEAD_COLOR, points[-1], 8)
         # Draw eyes
         eye_offset = 3
-        pygame.draw.circle(self.screen, self.WHITE, 
+        pygame.draw.circle(surface, self.WHITE, 
                          (points[-1][0] - eye_offset, points[-1][1] - eye_offset), 2)
-        pygame.draw.circle(self.screen, self.WHITE, 
+        pygame.draw.circle(surface, self.WHITE, 
                          (points[-1][0] + eye_offset, points[-1][1] - eye_offset), 2)
     
-    def draw_ladder(self, start_pos, end_pos):
+    def draw_ladder(self, start_pos, end_pos, surface=None):
         """Draw a realistic ladder between two positions"""
+        surface = self.screen if surface is None else surface
         start_x, start_y = start_pos
         end_x, end_y = end_pos
         
@@ -190,7 +225,7 @@ class SnakeAndLadderVisualizer:
         # Draw side rails with wood texture
         for i in range(2):
             offset = i * 2 - 1
-            pygame.draw.line(self.screen, 
+            pygame.draw.line(surface, 
                            self.LADDER_COLOR,
                            (start_x + perpx * offset, start_y + perpy * offset),
                            (end_x + perpx * offset, end_y + perpy * offset),
@@ -202,7 +237,7 @@ class SnakeAndLadderVisualizer:
             t = i / num_rungs
             x1 = start_x + dx * t
             y1 = start_y + dy * t
-            pygame.draw.line(self.screen,
+            pygame.draw.line(surface,
                            self.LADDER_COLOR,
                            (x1 + perpx, y1 + perpy),
                            (x1 - perpx, y1 - perpy),
@@ -245,8 +280,8 @@ class SnakeAndLadderVisualizer:
                 return button_name
         return None
     
-    def draw_dice(self, number, x, y, rotation=0):
-        """Draw an animated dice with rotation"""
+    def render_dice(self, number):
+        """Render an upright dice face onto a new surface"""
         # Create a new surface for the dice
         dice = pygame.Surface((self.dice_size, self.dice_size), pygame.SRCALPHA)
         dice.fill((0, 0, 0, 0))
@@ -267,32 +302,98 @@ class SnakeAndLadderVisualizer:
             scaled_x = int(dot[0] * self.dice_size / 40)
             scaled_y = int(dot[1] * self.dice_size / 40)
             pygame.draw.circle(dice, self.BLACK, (scaled_x, scaled_y), 4)
-        
-        # Rotate the dice
-        rotated_dice = pygame.transform.rotate(dice, rotation)
-        
-        # Draw the rotated dice
-        self.screen.blit(rotated_dice, (x - rotated_dice.get_width()//2, 
-                                      y - rotated_dice.get_height()//2))
+        return dice
     
-    def draw_board(self, current_position, snakes, ladders, steps=0, current_dice=0, game_state="idle"):
+    def get_dice_sprites(self, number):
+        """Return every rotation step of a dice face, rendering them on first use"""
+        sprites = self.dice_atlas.get(number)
+        if sprites is None:
+            dice = self.render_dice(number)
+            sprites = []
+            for angle in range(0, 360, self.dice_rotation_step):
+                rotated_dice = pygame.transform.rotate(dice, angle).convert_alpha()
+                sprites.append((rotated_dice, rotated_dice.get_width()//2, rotated_dice.get_height()//2))
+            self.dice_atlas[number] = sprites
+        return sprites
+    
+    def draw_dice(self, number, x, y, rotation=0):
+        """Draw an animated dice with rotation"""
+        sprites = self.get_dice_sprites(number)
+        rotated_dice, offset_x, offset_y = sprites[round(rotation / self.dice_rotation_step) % len(sprites)]
+        self.screen.blit(rotated_dice, (x - offset_x, y - offset_y))
+    
+    def invalidate_static_layer(self):
+        """Force the static board layer to be re-rendered on the next frame"""
+        self.static_layer = None
+        self.static_layer_key = None
+        self.full_update = True
+    
+    def track_region(self, name, rect, signature=None):
+        """Mark a screen region dirty if its position or content changed
+        
+        Both the old and the new rect are queued, so whatever was drawn there
+        last frame gets painted over. Pass a rect of None when the item is
+        no longer drawn.
+        """
+        previous = self.regions.get(name)
+        if previous == (rect, signature):
+            return
+        if previous is not None and previous[0] is not None and previous[0] != rect:
+            self.pending_rects.append(previous[0])
+        if rect is not None:
+            self.pending_rects.append(rect)
+        self.regions[name] = (rect, signature)
+    
+    def present(self):
+        """Push the frame to the display, only the dirty regions if possible"""
+        screen_rect = self.screen.get_rect()
+        if self.headless:
+            # Frames stay on the offscreen surface for the caller to read
+            pixels = 0
+        elif not self.dirty_rects or self.full_update:
+            pygame.display.flip()
+            pixels = screen_rect.width * screen_rect.height
+            self.full_update = False
+        else:
+            rects = [rect.clip(screen_rect) for rect in self.pending_rects]
+            pygame.display.update(rects)
+            pixels = sum(rect.width * rect.height for rect in rects)
+        
+        self.pending_rects = []
+        self.last_update_pixels = pixels
+        self.frames_presented += 1
+        self.pixels_presented += pixels
+        return pixels
+    
+    def token_rect(self, pos):
+        """Screen area covered by a player token and its shadow at a pixel position"""
+        radius = int(self.cell_size / 4) + 1
+        return pygame.Rect(int(pos[0]) - radius, int(pos[1]) - radius, 2 * radius + 3, 2 * radius + 3)
+    
+    def get_static_layer(self, snakes, ladders):
+        """Return the cached background, title, grid, snakes and ladders
+        
+        The layer is rendered once and reused until the layout or the window
+        size changes.
+        """
+        key = (self.screen.get_size(), tuple(sorted(snakes.items())), tuple(sorted(ladders.items())))
+        if self.static_layer is None or key != self.static_layer_key:
+            self.static_layer = pygame.Surface(self.screen.get_size()).convert()
+            self.static_layer_key = key
+            self.full_update = True
+            self.draw_static_layer(self.static_layer, snakes, ladders)
+        return self.static_layer
+    
+    def draw_static_layer(self, surface, snakes, ladders):
+        """Draw everything that does not change during a game onto a surface"""
         # Draw background
-        self.screen.fill(self.BOARD_COLOR)
+        surface.fill(self.BOARD_COLOR)
         
         # Draw title with shadow
         title = self.title_font.render("Snake and Ladder Game", True, self.TEXT_COLOR)
         title_shadow = self.title_font.render("Snake and Ladder Game", True, self.BUTTON_SHADOW_COLOR)
-        self.screen.blit(title_shadow, (self.width//2 - title.get_width()//2 + 2, 12))
-        self.screen.blit(title, (self.width//2 - title.get_width()//2, 10))
-        
-        # Draw game state indicator
-        state_color = self.state_colors.get(game_state, (200, 200, 200))
-        pygame.draw.circle(self.screen, state_color, (self.width - 20, 20), 8)
-        
-        # Draw instructions for roll mode
-        if game_state == "roll":
-            instructions = self.stats_font.render("Click 'Roll Dice' to roll!", True, self.TEXT_COLOR)
-            self.screen.blit(instructions, (self.width//2 - instructions.get_width()//2, 40))
+        surface.blit(title_shadow, (self.width//2 - title.get_width()//2 + 2, 12))
+        surface.blit(title, (self.width//2 - title.get_width()//2, 10))
         
         # Draw grid
         for i in range(10):
@@ -309,30 +410,53 @@ class SnakeAndLadderVisualizer:
                 
                 # Draw cell with gradient
                 cell_color = self.CELL_COLOR1 if (i + j) % 2 == 0 else self.CELL_COLOR2
-                pygame.draw.rect(self.screen, cell_color, (x, y, self.cell_size, self.cell_size))
-                pygame.draw.rect(self.screen, self.BLACK, (x, y, self.cell_size, self.cell_size), 1)
+                pygame.draw.rect(surface, cell_color, (x, y, self.cell_size, self.cell_size))
+                pygame.draw.rect(surface, self.BLACK, (x, y, self.cell_size, self.cell_size), 1)
                 
                 # Special colors for start and end
                 if cell_num == 1:
-                    pygame.draw.rect(self.screen, self.START_COLOR, (x, y, self.cell_size, self.cell_size), 3)
+                    pygame.draw.rect(surface, self.START_COLOR, (x, y, self.cell_size, self.cell_size), 3)
                 elif cell_num == 100:
-                    pygame.draw.rect(self.screen, self.END_COLOR, (x, y, self.cell_size, self.cell_size), 3)
+                    pygame.draw.rect(surface, self.END_COLOR, (x, y, self.cell_size, self.cell_size), 3)
                 
                 # Draw cell number
                 text = self.cell_font.render(str(cell_num), True, self.TEXT_COLOR)
                 text_rect = text.get_rect(center=(x + self.cell_size/2, y + self.cell_size/2))
-                self.screen.blit(text, text_rect)
+                surface.blit(text, text_rect)
         
         # Draw snakes and ladders
         for start, end in snakes.items():
-            self.draw_snake(self.get_cell_center(start), self.get_cell_center(end))
+            self.draw_snake(self.get_cell_center(start), self.get_cell_center(end), surface)
         
         for start, end in ladders.items():
-            self.draw_ladder(self.get_cell_center(start), self.get_cell_center(end))
+            self.draw_ladder(self.get_cell_center(start), self.get_cell_center(end), surface)
+    
+    def draw_board(self, current_position, snakes, ladders, steps=0, current_dice=0, game_state="idle",
+                   moving_token=None, analytics=None):
+        """Draw a frame and present it; moving_token is the pixel position of a token in flight
+
+        analytics is a list of status lines from a background analytics run.
+        """
+        # Draw the cached background, title, grid, snakes and ladders
+        self.screen.blit(self.get_static_layer(snakes, ladders), (0, 0))
+        
+        # Draw game state indicator
+        state_color = self.state_colors.get(game_state, (200, 200, 200))
+        state_rect = pygame.draw.circle(self.screen, state_color, (self.width - 20, 20), 8)
+        self.track_region("state", state_rect, game_state)
+        
+        # Draw instructions for roll mode
+        instructions_rect = None
+        if game_state == "roll":
+            instructions = self.stats_font.render("Click 'Roll Dice' to roll!", True, self.TEXT_COLOR)
+            instructions_rect = self.screen.blit(instructions, (self.width//2 - instructions.get_width()//2, 40))
+        self.track_region("instructions", instructions_rect)
         
         # Draw current position
+        token_rect = None
         if current_position > 0:
             pos = self.get_cell_center(current_position)
+            token_rect = self.token_rect(pos)
             # Draw shadow
             pygame.draw.circle(self.screen, (50, 50, 50), 
                              (pos[0] + 2, pos[1] + 2), self.cell_size/4)
@@ -340,25 +464,36 @@ class SnakeAndLadderVisualizer:
             pygame.draw.circle(self.screen, self.PLAYER_COLOR, pos, self.cell_size/4)
             # Draw highlight
             pygame.draw.circle(self.screen, self.WHITE, pos, self.cell_size/4, 2)
+        self.track_region("token", token_rect)
+        
+        # Draw the token moving between cells
+        moving_rect = None
+        if moving_token is not None:
+            x, y = int(moving_token[0]), int(moving_token[1])
+            pygame.draw.circle(self.screen, (100, 100, 100), (x + 2, y + 2), self.cell_size/4)
+            pygame.draw.circle(self.screen, self.PLAYER_COLOR, (x, y), self.cell_size/4)
+            moving_rect = self.token_rect((x, y))
+        self.track_region("moving token", moving_rect)
         
         # Draw statistics
-        self.draw_stats(steps, current_dice, game_state)
+        self.draw_stats(steps, current_dice, game_state, analytics)
         
         # Draw buttons with hover and pressed states
         mouse_pos = pygame.mouse.get_pos()
-        self.draw_button(self.start_button, "Start", 
-                        self.start_button.collidepoint(mouse_pos),
-                        self.button_pressed == "start")
-        self.draw_button(self.reset_button, "Reset", 
-                        self.reset_button.collidepoint(mouse_pos),
-                        self.button_pressed == "reset")
-        self.draw_button(self.roll_button, "Roll Dice", 
-                        self.roll_button.collidepoint(mouse_pos),
-                        self.button_pressed == "roll")
-        
-        pygame.display.flip()
+        for name, button, text in [
+            ("start", self.start_button, "Start"),
+            ("reset", self.reset_button, "Reset"),
+            ("roll", self.roll_button, "Roll Dice")
+        ]:
+            hover = button.collidepoint(mouse_pos)
+            pressed = self.button_pressed == name
+            self.draw_button(button, text, hover, pressed)
+            # Include the drop shadow in the button's region
+            self.track_region(f"{name} button", button.union(button.move(3, 3)), (hover, pressed))
+        
+        self.present()
     
-    def draw_stats(self, steps, current_dice, game_state):
+    def draw_stats(self, steps, current_dice, game_state, analytics=None):
         """Draw game statistics with enhanced visuals"""
         y_pos = self.height - 120
         
@@ -369,6 +504,8 @@ class SnakeAndLadderVisualizer:
                         border_radius=10)
         pygame.draw.rect(self.screen, self.BLACK, stats_bg, 2, 
                         border_radius=10)
+        analytics = tuple(analytics or ())
+        self.track_region("stats", stats_bg, (steps, current_dice, game_state, analytics))
         
         stats = [
             f"Steps taken: {steps}",
@@ -380,6 +517,11 @@ class SnakeAndLadderVisualizer:
             text = self.stats_font.render(stat, True, self.TEXT_COLOR)
             self.screen.blit(text, (self.margin + 10, y_pos + i * 25))
         
+        # Draw background analytics progress in the middle column, above the buttons
+        for i, line in enumerate(analytics[:2]):
+            text = self.stats_font.render(line, True, self.TEXT_COLOR)
+            self.screen.blit(text, (self.margin + 250, y_pos + i * 25))
+        
         # Draw current dice with animation
         if 1 <= current_dice <= 6:
             # Calculate dice position
@@ -389,9 +531,16 @@ class SnakeAndLadderVisualizer:
             # Draw dice with rotation animation
             self.draw_dice(current_dice, dice_x, dice_y, 
                          self.dice_rotation_angle)
+            dice_rect = pygame.Rect(0, 0, self.dice_size * 3 // 2, self.dice_size * 3 // 2)
+            dice_rect.center = (dice_x, dice_y)
+            self.track_region("dice", dice_rect, (current_dice, self.dice_rotation_angle))
             
-            # Update rotation angle for next frame
-            self.dice_rotation_angle = (self.dice_rotation_angle + 5) % 360
+            # Update rotation angle from the clock for the next frame
+            ticks = pygame.time.get_ticks() if self.frame_time is None else self.frame_time
+            step = int(ticks * self.dice_spin_speed) // (1000 * self.dice_rotation_step)
+            self.dice_rotation_angle = (step * self.dice_rotation_step) % 360
+        else:
+            self.track_region("dice", None)
     
     def close(self):
         pygame.quit() 
\ No newline at end of file